@@ -0,0 +1,407 @@
+# Offline text analytics over harvested reviews: tokens, sentiment and an inverted keyword index.
+#
+# Reviews are processed in batches with numpy: each batch is tokenised by one regex pass over
+# the joined texts, terms are mapped to integer IDs, and lexicon sentiment is summed per review
+# with bincount. The index lives in SQLite: one posting list (review IDs) per term, plus
+# per-state and per-store term counts, so keyword queries never re-read the review files.
+import sys
+import argparse
+import glob
+import os
+import re
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+
+import schema
+
+# --- CONFIGURATION ---
+load_dotenv()
+
+ANALYTICS_PATH = os.getenv("BUNNINGS_ANALYTICS_PATH", os.path.join("output", "review_analytics.sqlite"))
+REVIEW_GLOBS = [os.path.join("output", "bunnings_reviews_*"), os.path.join("output", "bunnings_review_sync_*")]
+
+BATCH_SIZE = 50_000  # reviews tokenised per batch
+STORE_TERMS_LIMIT = 200  # most frequent terms kept per store
+NEGATIVE_THRESHOLD = -0.05  # sentiment below this (or a 1-2 star rating) counts as a complaint
+
+# Words, keeping contractions such as "wasn't" whole; \x00 separates reviews in a batch
+TOKEN_PATTERN = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)?|\x00")
+
+STOPWORDS = frozenset("""
+a an and are as at be been but by for from had has have he her his i if in into is it its me my of on or
+our she so than that the their them then there they this to too us was we were what when where which who
+will with you your just also very really get got one all out up about would could there's it's i'm i've
+""".split())
+
+NEGATIONS = frozenset("""
+not no never nothing nobody none hardly barely without isn't wasn't aren't weren't don't doesn't didn't
+can't cannot couldn't won't wouldn't shouldn't haven't hasn't hadn't
+""".split())
+
+# Compact retail-review lexicon, scored -3 (very negative) to +3 (very positive)
+LEXICON = {
+    # positive
+    "good": 2, "great": 3, "excellent": 3, "amazing": 3, "awesome": 3, "fantastic": 3, "brilliant": 3,
+    "helpful": 2, "friendly": 2, "polite": 2, "knowledgeable": 2, "courteous": 2, "professional": 2,
+    "clean": 1, "tidy": 1, "organised": 1, "organized": 1, "easy": 1, "quick": 1, "fast": 1,
+    "efficient": 2, "love": 3, "loved": 3, "like": 1, "nice": 2, "pleasant": 2, "happy": 2,
+    "recommend": 2, "recommended": 2, "best": 3, "better": 1, "cheap": 1, "affordable": 1, "value": 1,
+    "plenty": 1, "well": 1, "fresh": 1, "thanks": 2, "thank": 2, "perfect": 3, "wonderful": 3,
+    "convenient": 1, "spacious": 1, "stocked": 1, "patient": 2, "attentive": 2, "welcoming": 2,
+    "satisfied": 2, "enjoy": 2, "enjoyed": 2, "superb": 3, "outstanding": 3, "fabulous": 3,
+    # negative
+    "bad": -2, "terrible": -3, "awful": -3, "horrible": -3, "worst": -3, "poor": -2, "rude": -3,
+    "unhelpful": -2, "useless": -3, "slow": -1, "dirty": -2, "messy": -2, "crowded": -1, "busy": -1,
+    "expensive": -1, "overpriced": -2, "disappointed": -2, "disappointing": -2, "disappointment": -2,
+    "wait": -1, "waited": -1, "waiting": -1, "queue": -1, "queues": -1, "understaffed": -2,
+    "ignored": -2, "ignore": -2, "complain": -2, "complaint": -2, "complaints": -2, "broken": -2,
+    "damaged": -2, "faulty": -2, "wrong": -2, "lazy": -2, "incompetent": -3, "arrogant": -3,
+    "frustrating": -2, "frustrated": -2, "annoying": -2, "annoyed": -2, "angry": -3, "hate": -3,
+    "problem": -1, "problems": -1, "issue": -1, "issues": -1, "lost": -1, "missing": -1,
+    "unfriendly": -2, "confusing": -1, "confused": -1, "avoid": -2, "never": -1, "refund": -1,
+    "refused": -2, "scam": -3, "shocking": -3, "pathetic": -3, "dismissive": -2, "clueless": -2,
+}
+
+# Unnormalised scores are squashed into [-1, 1] as s / sqrt(s^2 + ALPHA), as in VADER
+ALPHA = 15
+
+
+INDEXES = """
+    CREATE INDEX IF NOT EXISTS reviews_state_time ON reviews (state, publish_time);
+    CREATE INDEX IF NOT EXISTS reviews_place ON reviews (place_id);
+"""
+
+
+def connect(path: str = ANALYTICS_PATH, indexes: bool = True):
+    """Open the analytics database, creating tables (and, unless bulk loading, indexes) on first use."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS reviews (
+            review_id INTEGER PRIMARY KEY,
+            place_id TEXT, state TEXT, store_name TEXT,
+            publish_time TEXT, rating INTEGER, sentiment REAL, negative INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS terms (
+            term_id INTEGER PRIMARY KEY,
+            term TEXT UNIQUE,
+            reviews INTEGER,
+            postings BLOB  -- sorted int32 review IDs
+        );
+        CREATE TABLE IF NOT EXISTS state_terms (
+            state TEXT, term_id INTEGER, reviews INTEGER, negative_reviews INTEGER,
+            PRIMARY KEY (state, term_id)
+        );
+        CREATE TABLE IF NOT EXISTS store_terms (
+            place_id TEXT, term_id INTEGER, reviews INTEGER, negative_reviews INTEGER,
+            PRIMARY KEY (place_id, term_id)
+        );
+        """
+    )
+    if indexes:
+        conn.executescript(INDEXES)
+    return conn
+
+
+def review_files() -> list:
+    """Harvest and sync outputs under output/."""
+    return sorted({path for pattern in REVIEW_GLOBS for path in glob.glob(pattern)})
+
+
+def load_reviews(paths: list):
+    """Concatenate review files / Parquet datasets, de-duplicated by place, author and publish time."""
+    import pandas as pd
+
+    columns = ["Place ID", "State", "Store Name", "Author", "Rating", "Publish Time", "Text"]
+    frames = [schema.load_reviews(path, columns) for path in paths]
+    df = pd.concat(frames, ignore_index=True) if frames else schema.to_frame([], "reviews")
+    df = df.reindex(columns=columns)
+    key = df["Author"].str.strip().str.lower()
+    df = df[~pd.DataFrame({"p": df["Place ID"], "a": key, "t": df["Publish Time"]}).duplicated()]
+    return df.reset_index(drop=True)
+
+
+class Vocabulary:
+    """Growing term -> ID map with per-term lexicon scores and stopword / negation flags."""
+
+    def __init__(self):
+        import numpy as np
+
+        self.ids = {}
+        self.terms = []
+        self.scores = np.zeros(0, dtype="float32")
+        self.indexed = np.zeros(0, dtype=bool)
+        self.negation = np.zeros(0, dtype=bool)
+
+    def lookup(self, uniques):
+        """Global IDs for an array of batch-unique terms, adding new ones."""
+        import numpy as np
+
+        ids = np.empty(len(uniques), dtype="int32")
+        new = []
+        for i, term in enumerate(uniques):
+            term_id = self.ids.get(term)
+            if term_id is None:
+                term_id = self.ids[term] = len(self.terms)
+                self.terms.append(term)
+                new.append(term)
+            ids[i] = term_id
+        if new:
+            self.scores = np.concatenate([self.scores, [LEXICON.get(t, 0) for t in new]]).astype("float32")
+            self.indexed = np.concatenate([self.indexed, [len(t) > 2 and t not in STOPWORDS and t not in NEGATIONS for t in new]])
+            self.negation = np.concatenate([self.negation, [t in NEGATIONS for t in new]])
+        return ids
+
+
+def analyse_batch(texts, first_review: int, vocab: Vocabulary):
+    """Tokenise one batch. Returns (sentiment per review, posting term IDs, posting review IDs)."""
+    import numpy as np
+    import pandas as pd
+
+    # One regex pass over the whole batch; separators mark where each review starts
+    tokens = TOKEN_PATTERN.findall("\x00".join(texts).lower() + "\x00")
+    codes, uniques = pd.factorize(pd.Series(tokens, dtype=object), sort=False)
+    term_ids = vocab.lookup(uniques)[codes]
+
+    separator = vocab.ids.get("\x00")
+    is_sep = term_ids == separator
+    review_of = np.cumsum(is_sep) - is_sep  # review position of each token within the batch
+    keep = ~is_sep
+    term_ids, review_of = term_ids[keep], review_of[keep]
+
+    # Lexicon sentiment, flipped when the previous token in the same review is a negation
+    scores = vocab.scores[term_ids].astype("float64")
+    negated = np.zeros(len(term_ids), dtype=bool)
+    negated[1:] = vocab.negation[term_ids[:-1]] & (review_of[1:] == review_of[:-1])
+    scores[negated] *= -0.75
+    totals = np.bincount(review_of, weights=scores, minlength=len(texts))
+    sentiment = totals / np.sqrt(totals * totals + ALPHA)
+
+    # One posting per (term, review), excluding stopwords and very short tokens,
+    # packed as term << 32 | review so one sort orders them by term, then review
+    indexed = vocab.indexed[term_ids]
+    pairs = _sorted_unique(term_ids[indexed].astype("int64") << 32 | (review_of[indexed] + first_review))
+    return sentiment, pairs
+
+
+def _sorted_unique(values):
+    """np.unique via sort + neighbour comparison; much cheaper than the hash path for int64 keys."""
+    import numpy as np
+
+    values = np.sort(values)
+    if len(values) == 0:
+        return values
+    return values[np.concatenate(([True], values[1:] != values[:-1]))]
+
+
+def _term_counts(keys, term_ids, negative, n_terms):
+    """(key code, term ID, reviews, negative reviews) for each key/term combination present."""
+    import numpy as np
+
+    combined = keys.astype("int64") * n_terms + term_ids
+    order = np.argsort(combined, kind="stable")
+    combined, negative = combined[order], negative[order]
+    if len(combined) == 0:
+        return combined, combined, combined, combined
+    starts = np.flatnonzero(np.concatenate(([True], combined[1:] != combined[:-1])))
+    unique = combined[starts]
+    reviews = np.diff(np.append(starts, len(combined)))
+    negatives = np.add.reduceat(negative, starts)
+    return unique // n_terms, unique % n_terms, reviews, negatives
+
+
+def build(paths: list, path: str = ANALYTICS_PATH, batch_size: int = BATCH_SIZE) -> int:
+    """(Re)build the analytics database from review files. Returns the number of reviews indexed."""
+    import numpy as np
+    import pandas as pd
+
+    df = load_reviews(paths)
+    texts = df["Text"].fillna("").astype(str).tolist()
+    vocab = Vocabulary()
+    vocab.lookup(["\x00"])
+
+    sentiment = np.zeros(len(df))
+    batches = []
+    for start in range(0, len(df), batch_size):
+        batch_sentiment, pairs = analyse_batch(texts[start:start + batch_size], start, vocab)
+        sentiment[start:start + len(batch_sentiment)] = batch_sentiment
+        batches.append(pairs)
+
+    rating = pd.to_numeric(df["Rating"], errors="coerce")
+    negative = ((sentiment < NEGATIVE_THRESHOLD) | (rating <= 2).to_numpy()).astype("int64")
+
+    # Posting lists: sort the packed (term, review) pairs and slice one run per term
+    pairs = np.sort(np.concatenate(batches)) if batches else np.zeros(0, dtype="int64")
+    terms = (pairs >> 32).astype("int32")
+    reviews = (pairs & 0xFFFFFFFF).astype("int32")
+    starts = np.flatnonzero(np.concatenate(([True], terms[1:] != terms[:-1]))) if len(terms) else terms
+    counts = np.diff(np.append(starts, len(terms)))
+
+    if os.path.exists(path):
+        os.remove(path)
+    # Bulk load into a fresh database; indexes are built once at the end
+    conn = connect(path, indexes=False)
+    times = df["Publish Time"].dt.tz_localize(None).to_numpy(dtype="datetime64[s]")
+    publish = np.char.add(np.datetime_as_string(times, unit="s"), "Z").astype(object)
+    publish[np.isnat(times)] = None
+
+    def column(name, upper=False):
+        values = df[name].fillna("").astype(object)
+        return (values.str.upper() if upper else values).tolist()
+
+    conn.executemany(
+        "INSERT INTO reviews VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        zip(range(len(df)), column("Place ID"), column("State", upper=True), column("Store Name"),
+            publish.tolist(), [None if r != r else int(r) for r in rating.tolist()],
+            sentiment.round(4).tolist(), negative.tolist()),
+    )
+    conn.executemany(
+        "INSERT INTO terms VALUES (?, ?, ?, ?)",
+        ((int(terms[s]), vocab.terms[terms[s]], int(n), reviews[s:s + n].tobytes())
+         for s, n in zip(starts, counts)),
+    )
+
+    # Per-state and per-store term counts, so "top keywords" queries are a single lookup
+    neg = negative[reviews]
+    for table, column, key_limit in (("state_terms", "State", None), ("store_terms", "Place ID", STORE_TERMS_LIMIT)):
+        codes, labels = pd.factorize(df[column].fillna("").str.upper() if column == "State" else df[column].fillna(""))
+        keys, term_ids, counts_, negatives = _term_counts(codes[reviews], terms, neg, len(vocab.terms))
+        frame = pd.DataFrame({"key": np.asarray(labels)[keys], "term": term_ids, "reviews": counts_, "negative": negatives})
+        if key_limit:
+            frame = frame.sort_values(["key", "reviews"], ascending=[True, False]).groupby("key").head(key_limit)
+        conn.executemany(f"INSERT INTO {table} VALUES (?, ?, ?, ?)",
+                         zip(frame["key"], frame["term"].tolist(), frame["reviews"].tolist(), frame["negative"].tolist()))
+    conn.executescript(INDEXES)
+    conn.commit()
+    conn.close()
+    return len(df)
+
+
+def _postings(conn, term: str):
+    import numpy as np
+
+    row = conn.execute("SELECT postings FROM terms WHERE term = ?", (term.lower(),)).fetchone()
+    return np.frombuffer(row[0], dtype="int32") if row else np.zeros(0, dtype="int32")
+
+
+def stores_mentioning(conn, term: str, state: str = None, since: str = None, negative: bool = False, limit: int = 10):
+    """Stores ranked by reviews mentioning `term` (complaints only with negative=True).
+
+    e.g. stores_mentioning(conn, "staff", state="VIC", since="2025-09-01", negative=True)
+    """
+    import numpy as np
+    import pandas as pd
+
+    where, params = ["1 = 1"], []
+    if state:
+        where.append("state = ?")
+        params.append(state.upper())
+    if since:
+        where.append("publish_time >= ?")
+        params.append(since)
+    if negative:
+        where.append("negative = 1")
+    reviews = pd.read_sql_query(
+        f"SELECT review_id, place_id, store_name, state, sentiment FROM reviews WHERE {' AND '.join(where)}",
+        conn, params=params,
+    )
+    hits = reviews[np.isin(reviews["review_id"].to_numpy(), _postings(conn, term), assume_unique=True)]
+    if hits.empty:
+        return pd.DataFrame(columns=["Place ID", "Store Name", "State", "Mentions", "Average_Sentiment"])
+    ranked = (hits.groupby(["place_id", "store_name", "state"])
+              .agg(Mentions=("review_id", "size"), Average_Sentiment=("sentiment", "mean"))
+              .reset_index()
+              .rename(columns={"place_id": "Place ID", "store_name": "Store Name", "state": "State"})
+              .sort_values(["Mentions", "Average_Sentiment"], ascending=[False, True]))
+    return ranked.head(limit).reset_index(drop=True)
+
+
+def top_terms(conn, state: str = None, place_id: str = None, negative: bool = False, limit: int = 20):
+    """Most common keywords for a state, a store, or overall (by complaint count with negative=True)."""
+    import pandas as pd
+
+    count = "negative_reviews" if negative else "reviews"
+    if place_id:
+        source, where, params = "store_terms", "WHERE place_id = ?", [place_id]
+    elif state:
+        source, where, params = "state_terms", "WHERE state = ?", [state.upper()]
+    else:
+        source, where, params = "state_terms", "", []
+    return pd.read_sql_query(
+        f"SELECT t.term AS Term, SUM(s.reviews) AS Reviews, SUM(s.negative_reviews) AS Negative_Reviews"
+        f" FROM {source} s JOIN terms t ON t.term_id = s.term_id {where}"
+        f" GROUP BY t.term ORDER BY SUM(s.{count}) DESC LIMIT ?",
+        conn, params=params + [limit],
+    )
+
+
+def sentiment_by(conn, level: str = "state"):
+    """Average sentiment and complaint share per state or store."""
+    import pandas as pd
+
+    keys = "state AS State" if level == "state" else "place_id AS 'Place ID', store_name AS 'Store Name', state AS State"
+    group = "state" if level == "state" else "place_id"
+    return pd.read_sql_query(
+        f"SELECT {keys}, COUNT(*) AS Reviews, AVG(sentiment) AS Average_Sentiment,"
+        f" AVG(negative) AS Complaint_Share FROM reviews GROUP BY {group} ORDER BY Average_Sentiment",
+        conn,
+    )
+
+
+def since_days(days: float) -> str:
+    return (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sentiment and keyword analytics over harvested reviews.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("build", help="(re)build the index from review files")
+    p.add_argument("paths", nargs="*", help="review CSV/NDJSON files or Parquet datasets (default: output/ harvests)")
+
+    p = sub.add_parser("mentions", help="stores ranked by reviews mentioning a keyword")
+    p.add_argument("term")
+    p.add_argument("--state")
+    p.add_argument("--days", type=float, help="only reviews from the last N days")
+    p.add_argument("--complaints", action="store_true", help="only negative reviews")
+    p.add_argument("-n", type=int, default=10)
+
+    p = sub.add_parser("terms", help="most common keywords for a state or store")
+    p.add_argument("--state")
+    p.add_argument("--store", metavar="PLACE_ID")
+    p.add_argument("--complaints", action="store_true", help="rank by negative reviews")
+    p.add_argument("-n", type=int, default=20)
+
+    p = sub.add_parser("sentiment", help="average sentiment per state or store")
+    p.add_argument("--level", choices=["state", "store"], default="state")
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        paths = args.paths or review_files()
+        if not paths:
+            print("❌ No review files found; run harvest.py or sync.py first.")
+            sys.exit(1)
+        started = datetime.now()
+        count = build(paths)
+        print(f"🧠 Indexed {count} reviews from {len(paths)} sources in "
+              f"{(datetime.now() - started).total_seconds():.1f}s → {ANALYTICS_PATH}")
+        sys.exit(0)
+
+    if not os.path.exists(ANALYTICS_PATH):
+        print("❌ No analytics index yet; run `python analytics.py build` first.")
+        sys.exit(1)
+    conn = connect()
+    if args.command == "mentions":
+        since = since_days(args.days) if args.days else None
+        print(stores_mentioning(conn, args.term, args.state, since, args.complaints, args.n).to_string(index=False))
+    elif args.command == "terms":
+        print(top_terms(conn, args.state, args.store, args.complaints, args.n).to_string(index=False))
+    else:
+        print(sentiment_by(conn, args.level).to_string(index=False))
+    conn.close()
@@ -1,6 +1,6 @@
 # Fetch and display Google reviews for a Bunnings Warehouse in a specified suburb.
 import sys
-import requests
+import client
 from datetime import datetime
 from dotenv import load_dotenv
 import os
@@ -15,14 +15,15 @@ API_KEY = os.getenv("GOOGLE_PLACES_API_KEY")
 def get_place_id(suburb: str, api_key: str):
     """Find the Place ID for a Bunnings Warehouse in the given suburb."""
     query = f"Bunnings Warehouse {suburb}"
-    url = (
-        "https://maps.googleapis.com/maps/api/place/findplacefromtext/json"
-        f"?input={query}&inputtype=textquery&fields=place_id,name,formatted_address"
-        f"&key={api_key}"
-    )
+    url = f"{client.MAPS_API_ROOT}/maps/api/place/findplacefromtext/json"
+    params = {
+        "input": query,
+        "inputtype": "textquery",
+        "fields": "place_id,name,formatted_address",
+        "key": api_key,
+    }
 
-    response = requests.get(url)
-    data = response.json()
+    data = client.fetch_json("GET", url, params=params)
 
     if data.get("status") != "OK" or not data.get("candidates"):
         print(f"❌ Could not find a Bunnings in '{suburb}'. Response: {data.get('status')}")
@@ -34,14 +35,14 @@ def get_place_id(suburb: str, api_key: str):
 
 def get_bunnings_reviews(place_id: str, api_key: str):
     """Fetch and print Google reviews for the given place ID."""
-    url = (
-        "https://maps.googleapis.com/maps/api/place/details/json"
-        f"?place_id={place_id}&fields=name,rating,user_ratings_total,reviews"
-        f"&key={api_key}"
-    )
-
-    response = requests.get(url)
-    data = response.json()
+    url = f"{client.MAPS_API_ROOT}/maps/api/place/details/json"
+    params = {
+        "place_id": place_id,
+        "fields": "name,rating,user_ratings_total,reviews",
+        "key": api_key,
+    }
+
+    data = client.fetch_json("GET", url, params=params)
 
     if "result" not in data:
         print("❌ No place found or API error:", data.get("status"))
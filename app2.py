@@ -1,6 +1,6 @@
 import sys
 import csv
-import requests
+import client
 from datetime import datetime
 from dotenv import load_dotenv
 import os
@@ -12,20 +12,18 @@ load_dotenv()
 # Get the API key
 API_KEY = os.getenv("GOOGLE_PLACES_API_KEY")
 
-# Create timestamp for file name
-timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-
 def get_place_id(suburb: str, api_key: str):
     """Find the Place ID for a Bunnings Warehouse in the given suburb."""
     query = f"Bunnings Warehouse {suburb}"
-    url = (
-        "https://maps.googleapis.com/maps/api/place/findplacefromtext/json"
-        f"?input={query}&inputtype=textquery&fields=place_id,name,formatted_address"
-        f"&key={api_key}"
-    )
+    url = f"{client.MAPS_API_ROOT}/maps/api/place/findplacefromtext/json"
+    params = {
+        "input": query,
+        "inputtype": "textquery",
+        "fields": "place_id,name,formatted_address",
+        "key": api_key,
+    }
 
-    response = requests.get(url)
-    data = response.json()
+    data = client.fetch_json("GET", url, params=params)
 
     if data.get("status") != "OK" or not data.get("candidates"):
         print(f"❌ Could not find a Bunnings in '{suburb}'. Response: {data.get('status')}")
@@ -36,16 +34,25 @@ def get_place_id(suburb: str, api_key: str):
     return candidate.get("place_id")
 
 
-def get_bunnings_reviews(place_id: str, api_key: str):
-    """Fetch Google reviews and metadata for the given place ID."""
-    url = (
-        "https://maps.googleapis.com/maps/api/place/details/json"
-        f"?place_id={place_id}&fields=name,rating,user_ratings_total,reviews"
-        f"&key={api_key}"
-    )
+def get_bunnings_reviews(place_id: str, api_key: str, sort: str = None, language: str = None):
+    """Fetch Google reviews and metadata for the given place ID.
+
+    sort ("most_relevant" or "newest") and language select a different
+    set of up to five reviews from the API.
+    """
+    url = f"{client.MAPS_API_ROOT}/maps/api/place/details/json"
+    params = {
+        "place_id": place_id,
+        "fields": "name,rating,user_ratings_total,reviews",
+        "key": api_key,
+    }
+    if sort:
+        params["reviews_sort"] = sort
+    if language:
+        params["language"] = language
+        params["reviews_no_translations"] = "true"
 
-    response = requests.get(url)
-    data = response.json()
+    data = client.fetch_json("GET", url, params=params)
 
     if "result" not in data:
         print("❌ No place found or API error:", data.get("status"))
@@ -58,6 +65,7 @@ def get_bunnings_reviews(place_id: str, api_key: str):
 
 def save_reviews_to_csv(suburb: str, store_info: dict, reviews: list):
     """Save reviews and store information to a CSV file."""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"./data/bunnings_reviews_{suburb.lower()}_{timestamp}.csv"
 
     with open(filename, "w", newline="", encoding="utf-8") as csvfile:
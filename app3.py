@@ -1,11 +1,16 @@
 # Store Bunnings Warehouse ratings from Google Maps into a CSV file.
-import requests
-import csv
+import sys
+import client
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from dotenv import load_dotenv
 import os
 
+import history
+import schema
+import writers
+
 # --- CONFIGURATION ---
 # Load the .env file
 load_dotenv()
@@ -13,81 +18,152 @@ load_dotenv()
 # Get the API key
 API_KEY = os.getenv("GOOGLE_PLACES_API_KEY")
 
-# Create timestamp for file name
-timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-
 # --- CONSTANTS ---
 SEARCH_QUERY = "Bunnings Warehouse"  # main search term
-OUTPUT_FILE = f"./data/bunnings_store_ratings_{timestamp}.csv"
+OUTPUT_PATTERN = "./data/bunnings_store_ratings_{timestamp}.csv"
 
-def get_all_bunnings_stores(api_key):
+# One query returns at most 60 stores, so also search state by state
+SEARCH_QUERIES = [SEARCH_QUERY] + [f"{SEARCH_QUERY} {state}" for state in ["NSW", "VIC", "QLD", "SA", "WA", "TAS", "ACT", "NT"]]
+MAX_WORKERS = int(os.getenv("BUNNINGS_MAX_WORKERS", "8"))  # queries paginated at once
+
+# Page-token polling: first wait, longest wait and give-up time, in seconds
+TOKEN_POLL_INITIAL = 0.25
+TOKEN_POLL_MAX = 1.0
+TOKEN_POLL_TIMEOUT = 10.0
+
+def fetch_page(base_url, params):
     """
-    Fetches all Bunnings stores from Google Places Text Search API,
-    following pagination to collect all results.
+    Requests one page of results. A fresh next_page_token is rejected with
+    INVALID_REQUEST until Google activates it, so poll it with a short,
+    growing delay instead of sleeping a fixed 2s before every page.
     """
-    stores = []
-    next_page_token = None
-    base_url = "https://maps.googleapis.com/maps/api/place/textsearch/json"
+    if "pagetoken" not in params:
+        response = client.get(base_url, params=params)
+        response.raise_for_status()
+        return response.json()
 
-    print("🔍 Fetching Bunnings stores from Google Maps...")
+    delay = TOKEN_POLL_INITIAL
+    deadline = time.monotonic() + TOKEN_POLL_TIMEOUT
+    while True:
+        time.sleep(delay)
+        response = client.get(base_url, params=params)
+        response.raise_for_status()
+        data = response.json()
+        if data.get("status") != "INVALID_REQUEST" or time.monotonic() >= deadline:
+            return data
+        delay = min(TOKEN_POLL_MAX, delay * 2)
+
+def iter_query(query, api_key):
+    """
+    Yields each page of results for one text search query, following
+    pagination until all pages (at most 60 results) are returned.
+    """
+    next_page_token = None
+    base_url = f"{client.MAPS_API_ROOT}/maps/api/place/textsearch/json"
 
     while True:
         params = {
-            "query": SEARCH_QUERY,
+            "query": query,
             "key": api_key,
         }
 
         if next_page_token:
             params["pagetoken"] = next_page_token
-            # Google requires a short delay before using next_page_token
-            time.sleep(2)
 
-        response = requests.get(base_url, params=params)
-        data = response.json()
+        data = fetch_page(base_url, params)
 
         if data.get("status") not in ["OK", "ZERO_RESULTS"]:
-            print(f"⚠️ API Error: {data.get('status')}")
-            break
+            raise RuntimeError(f"API error {data.get('status')}")
 
         results = data.get("results", [])
-        print(f"✅ Found {len(results)} results in this batch.")
-
-        for place in results:
-            stores.append({
-                "name": place.get("name"),
-                "address": place.get("formatted_address"),
-                "rating": place.get("rating"),
-                "user_ratings_total": place.get("user_ratings_total")
-            })
+        print(f"✅ Found {len(results)} results in this batch for '{query}'.")
+        yield results
 
         # Check for more pages
         next_page_token = data.get("next_page_token")
         if not next_page_token:
             break
 
-    print(f"\n✅ Total stores collected: {len(stores)}")
-    return stores
+def iter_bunnings_stores(api_key, queries=None, max_workers=MAX_WORKERS, failed=None):
+    """
+    Yields unique Bunnings stores from Google Places Text Search API.
+    Each query is capped at 60 results, so the national query is combined
+    with one per state; queries are paginated concurrently and stores are
+    deduplicated by place ID as each query completes. A query that fails is
+    reported (and appended to `failed`, if given) without stopping the others.
+    """
+    queries = queries or SEARCH_QUERIES
+    count = 0
+    seen = set()
 
-def save_to_csv(stores, filename):
-    """Saves all Bunnings store ratings to a CSV file."""
-    with open(filename, "w", newline="", encoding="utf-8") as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow(["Store Name", "Address", "Rating", "Total Ratings"])
+    print("🔍 Fetching Bunnings stores from Google Maps...")
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {executor.submit(lambda q: [p for page in iter_query(q, api_key) for p in page], q): q
+                   for q in queries}
+        for future in as_completed(futures):
+            try:
+                places = future.result()
+            except Exception as e:
+                print(f"⚠️ Query '{futures[future]}' failed: {e}")
+                if failed is not None:
+                    failed.append(futures[future])
+                continue
+            for place in places:
+                place_id = place.get("place_id")
+                if place_id in seen:
+                    continue
+                seen.add(place_id)
+                count += 1
+                yield {
+                    "place_id": place_id,
+                    "name": place.get("name"),
+                    "address": place.get("formatted_address"),
+                    "rating": place.get("rating"),
+                    "user_ratings_total": place.get("user_ratings_total")
+                }
+
+    print(f"\n✅ Total stores collected: {count}")
+
+def get_all_bunnings_stores(api_key):
+    """Fetches all Bunnings stores into a list."""
+    return list(iter_bunnings_stores(api_key))
 
+def save_to_csv(stores, filename):
+    """Streams Bunnings store ratings (any iterable) to a CSV, NDJSON or .gz file."""
+    fieldnames = ["Place ID", "Store Name", "Address", "Rating", "Total Ratings"]
+    with writers.RowWriter(filename, fieldnames) as writer:
         for s in stores:
-            writer.writerow([
-                s["name"],
-                s["address"],
-                s["rating"],
-                s["user_ratings_total"]
-            ])
+            writer.write({
+                "Place ID": s.get("place_id", ""),
+                "Store Name": s["name"],
+                "Address": s["address"],
+                "Rating": s["rating"],
+                "Total Ratings": s["user_ratings_total"]
+            })
+            writer.flush()
+        count = writer.count
 
-    print(f"💾 Data saved to {filename}")
+    print(f"💾 {count} stores saved to {filename}")
 
 def main():
-    stores = get_all_bunnings_stores(API_KEY)
-    if stores:
-        save_to_csv(stores, OUTPUT_FILE)
+    # Optional output path; a .ndjson and/or .gz extension picks the format
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = sys.argv[1] if len(sys.argv) > 1 else OUTPUT_PATTERN.format(timestamp=timestamp)
+    failed = []
+    save_to_csv(iter_bunnings_stores(API_KEY, failed=failed), filename)
+    if failed:
+        # A partial list would make the missing stores look closed in the history
+        print(f"⚠️ {len(failed)} queries failed; not adding this list to the rating history")
+        sys.exit(1)
+
+    conn = history.connect()
+    history.ingest_file(conn, filename)
+    conn.close()
+
+    if schema.PARQUET_DIR:
+        rows = (dict(r, State=schema.state_from_address(r["Address"])) for r in writers.read_rows(filename))
+        print(f"🧱 Parquet dataset updated: {schema.write_parquet(rows, 'stores', root=schema.PARQUET_DIR)}")
 
 if __name__ == "__main__":
     main()
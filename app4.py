@@ -1,6 +1,10 @@
 import sys
 import csv
-import requests
+import client
+import keypool
+from placeindex import PlaceIndex
+import planner
+import schema
 from dotenv import load_dotenv
 import os
 from datetime import datetime
@@ -12,28 +16,34 @@ from datetime import datetime
 load_dotenv() # Load the .env file
 
 API_KEY = os.getenv("GOOGLE_PLACES_NEW_API_KEY") # Get the API key
-SEARCH_URL = "https://places.googleapis.com/v1/places:searchText"
-DETAILS_URL = "https://places.googleapis.com/v1/places/"
+SEARCH_URL = f"{client.PLACES_API_ROOT}/v1/places:searchText"
+DETAILS_URL = f"{client.PLACES_API_ROOT}/v1/places/"
 
-# Create timestamp for file name
-timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+# Columns this script writes; the field masks are derived from them
+STORE_COLUMNS = ["Place ID", "Store Name", "Address", "Store Rating", "Total Ratings"]
+REVIEW_COLUMNS = ["Author", "Rating", "Date", "Text"]
 
 # -------------------------------
 # FUNCTIONS
 # -------------------------------
-def search_bunnings(suburb):
-    """Search for a Bunnings store in a given suburb."""
+def search_bunnings(suburb, columns=STORE_COLUMNS, language=None):
+    """Search for a Bunnings store in a given suburb, requesting only the fields behind `columns`.
+
+    Including review columns returns the reviews in the same call, so no details call is needed.
+    """
     query = f"Bunnings {suburb}, Australia"
     headers = {
         "Content-Type": "application/json",
-        "X-Goog-Api-Key": API_KEY,
-        "X-Goog-FieldMask": "places.id,places.displayName,places.formattedAddress,places.rating,places.userRatingCount"
+        "X-Goog-Api-Key": keypool.get_pool().acquire(),
+        "X-Goog-FieldMask": planner.search_mask(columns)
     }
-    data = {"textQuery": query}
+    # Only the first result is used; one result also keeps a reviews mask from pulling
+    # reviews for every match
+    data = {"textQuery": query, "pageSize": 1}
+    if language:
+        data["languageCode"] = language
 
-    response = requests.post(SEARCH_URL, headers=headers, json=data)
-    response.raise_for_status()
-    places = response.json().get("places", [])
+    places = client.fetch_json("POST", SEARCH_URL, headers=headers, json=data).get("places", [])
     
     if not places:
         print(f"No Bunnings found in {suburb}")
@@ -42,16 +52,15 @@ def search_bunnings(suburb):
     return places[0]  # Take the first (most relevant) result
 
 
-def get_reviews(place_id):
-    """Fetch reviews for a specific place ID."""
+def get_reviews(place_id, language=None):
+    """Fetch reviews for a specific place ID, optionally in a given language code."""
     headers = {
-        "X-Goog-Api-Key": API_KEY,
-        "X-Goog-FieldMask": "displayName,rating,userRatingCount,reviews"
+        "X-Goog-Api-Key": keypool.get_pool().acquire(),
+        "X-Goog-FieldMask": planner.details_mask(["Store Name", "Store Rating", "Total Ratings"] + REVIEW_COLUMNS)
     }
+    params = {"languageCode": language} if language else None
 
-    response = requests.get(f"{DETAILS_URL}{place_id}", headers=headers)
-    response.raise_for_status()
-    result = response.json()
+    result = client.fetch_json("GET", f"{DETAILS_URL}{place_id}", params=params, headers=headers)
 
     reviews = result.get("reviews", [])
     store_name = result.get("displayName", {}).get("text", "Unknown Store")
@@ -63,6 +72,7 @@ def get_reviews(place_id):
 
 def save_to_csv(suburb, store_name, store_rating, total_ratings, reviews):
     """Save reviews to a CSV file."""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"./data/bunnings_reviews_{suburb.lower().replace(' ', '_')}_{timestamp}.csv"
 
     with open(filename, mode="w", newline="", encoding="utf-8") as file:
@@ -92,17 +102,49 @@ def save_to_csv(suburb, store_name, store_rating, total_ratings, reviews):
 # -------------------------------
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python bunnings_reviews.py <suburb>")
+        print("Usage: python app4.py <suburb> [state]")
         sys.exit(1)
 
     suburb = sys.argv[1]
-    print(f"🔍 Searching for Bunnings in {suburb}...")
-
-    place = search_bunnings(suburb)
-    place_id = place["id"]
-
-    print(f"🏬 Found: {place['displayName']['text']} ({place['formattedAddress']})")
-    print(f"⭐ Rating: {place.get('rating', 'N/A')} ({place.get('userRatingCount', 0)} reviews)")
-
-    store_name, store_rating, total_ratings, reviews = get_reviews(place_id)
+    state = sys.argv[2].upper() if len(sys.argv) > 2 else ""
+    index = PlaceIndex()
+
+    # Reuse a recent resolution of this suburb instead of searching again
+    known = index.find_suburb(suburb, state)
+    if len({s for s, _ in known}) > 1:
+        # The same suburb name exists in several states (e.g. Richmond VIC/NSW)
+        states = ", ".join(sorted({s for s, _ in known}))
+        print(f"❓ {suburb} is known in {states}; pass the state, e.g. python app4.py \"{suburb}\" {known[0][0]}")
+        index.close()
+        sys.exit(1)
+    if known:
+        place_id = known[0][1]
+        address = index.address(place_id)
+        print(f"📇 {suburb} already resolved to place {place_id}")
+        store_name, store_rating, total_ratings, reviews = get_reviews(place_id)
+    else:
+        print(f"🔍 Searching for Bunnings in {suburb}{f' {state}' if state else ''}...")
+
+        # One search call returns the store and its reviews; no separate details call
+        place = search_bunnings(f"{suburb} {state}".strip(), STORE_COLUMNS + REVIEW_COLUMNS)
+        place_id = place["id"]
+        address = place.get("formattedAddress", "")
+        store_name = place.get("displayName", {}).get("text", "Unknown Store")
+        store_rating = place.get("rating", "N/A")
+        total_ratings = place.get("userRatingCount", 0)
+        reviews = place.get("reviews", [])
+
+        print(f"🏬 Found: {store_name} ({address})")
+        print(f"⭐ Rating: {store_rating} ({total_ratings} reviews)")
+        index.record_place(place_id, store_name, address)
+        index.record_suburb(state or schema.state_from_address(address), suburb, [place_id])
+
+    index.mark_details_fetched(place_id)
+    index.close()
     save_to_csv(suburb, store_name, store_rating, total_ratings, reviews)
+
+    if schema.PARQUET_DIR:
+        store = {"Place ID": place_id, "State": schema.state_from_address(address), "Store Name": store_name,
+                 "Store Rating": store_rating, "Total Ratings": total_ratings}
+        rows = [dict(store, **schema.normalise_new_review(r)) for r in reviews]
+        print(f"🧱 Parquet dataset updated: {schema.write_parquet(rows, 'reviews', root=schema.PARQUET_DIR)}")
@@ -1,93 +1,226 @@
 import sys
-import csv
-import requests
+import argparse
 from dotenv import load_dotenv
 import os
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import cache
+import client
+from checkpoint import Checkpoint
+import gazetteer
+import history
+import keypool
+import metrics
+import planner
+from placeindex import PlaceIndex
+from ratelimit import TokenBucket
+import schema
+import writers
 
 # Load environment variables
 load_dotenv()
-API_KEY = os.getenv("GOOGLE_PLACES_NEW_API_KEY")
-
-SEARCH_URL = "https://places.googleapis.com/v1/places:searchText"
+SEARCH_URL = f"{client.PLACES_API_ROOT}/v1/places:searchText"
 OUTPUT_DIR = "output"
 STORES_DIR = "stores"
 
-# Create timestamp for output file
-timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-output_file = os.path.join(OUTPUT_DIR, f"bunnings_stores_{timestamp}.csv")
-
-# Ensure output directory exists
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+# Concurrency cap and Places API queries-per-second quota for the sweep
+MAX_WORKERS = int(os.getenv("BUNNINGS_MAX_WORKERS", "8"))
+PLACES_QPS = float(os.getenv("PLACES_QPS", "10"))
 
 def search_bunnings(suburb):
     """Search for a Bunnings store in a given suburb."""
     query = f"Bunnings {suburb}, Australia"
     headers = {
         "Content-Type": "application/json",
-        "X-Goog-Api-Key": API_KEY,
-        "X-Goog-FieldMask": "places.id,places.displayName,places.formattedAddress,places.rating,places.userRatingCount"
+        "X-Goog-Api-Key": keypool.get_pool().acquire(),  # spread over every configured key
+        "X-Goog-FieldMask": planner.search_mask(FIELDNAMES)
     }
     data = {"textQuery": query}
 
-    response = requests.post(SEARCH_URL, headers=headers, json=data)
-    response.raise_for_status()
-    places = response.json().get("places", [])
+    places = client.fetch_json("POST", SEARCH_URL, headers=headers, json=data).get("places", [])
 
     return places
 
 
-def process_files():
-    """Read suburbs from all state files and write search results to CSV."""
-    all_rows = []
+def search_suburb(suburb, limiter=None, state=""):
+    """Search one suburb, waiting on the rate limiter first. Returns (places, error)."""
+    if limiter:
+        limiter.acquire()
+    try:
+        with metrics.scope(state):  # request metrics are broken down by state
+            return search_bunnings(suburb), None
+    except Exception as e:
+        return [], e
 
-    # Go through each file in the stores folder
-    for filename in os.listdir(STORES_DIR):
-        if not filename.endswith(".txt"):
+
+FIELDNAMES = ["Place ID", "State", "Suburb", "Store Name", "Address", "Store Rating", "Total Ratings",
+              "Latitude", "Longitude"]
+
+
+def read_written_place_ids(path):
+    """Place IDs already present in a partially written output file."""
+    if not os.path.exists(path):
+        return set()
+    return {row["Place ID"] for row in writers.read_rows(path) if row.get("Place ID")}
+
+
+def place_rows(state, suburb, places, seen):
+    """Yield one output row per place not already in `seen`, adding it as it goes."""
+    for place in places:
+        place_id = place.get("id", "")
+        # Neighbouring suburbs often resolve to the same store; keep the first suburb only
+        if place_id in seen:
             continue
+        if place_id:
+            seen.add(place_id)
+        yield {
+            "Place ID": place_id,
+            "State": state,
+            "Suburb": suburb,
+            "Store Name": place.get("displayName", {}).get("text", ""),
+            "Address": place.get("formattedAddress", ""),
+            "Store Rating": place.get("rating", ""),
+            "Total Ratings": place.get("userRatingCount", ""),
+            "Latitude": place.get("location", {}).get("latitude", ""),
+            "Longitude": place.get("location", {}).get("longitude", "")
+        }
+
+
+def process_files(max_workers=MAX_WORKERS, qps=PLACES_QPS, resume=None, fmt="csv", compress=False,
+                  parquet_dir=schema.PARQUET_DIR):
+    """Read suburbs from all state files and stream search results to CSV or NDJSON.
+
+    Each completed suburb is flushed to the output file and checkpointed, so
+    passing resume ("latest" or a run ID) continues an interrupted run.
+    """
+    checkpoint = Checkpoint()
+    run = None
+    if resume:
+        run = checkpoint.latest_unfinished() if resume == "latest" else checkpoint.get_run(resume)
+        if run is None:
+            print(f"⚠️ No run to resume ({resume}), starting a new one")
+
+    if run:
+        run_id, run_output = run
+        print(f"⏯️ Resuming run {run_id} into {run_output}")
+    else:
+        # New runs are named after their start time
+        run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        run_output = writers.output_path(os.path.join(OUTPUT_DIR, f"bunnings_stores_{run_id}"), fmt, compress)
+        checkpoint.start_run(run_id, run_output)
+
+    gaz = gazetteer.load()  # rebuilt here if stores/*.txt changed since the last run
+    # One spelling per suburb: alias spellings in the list would only repeat a search
+    state_files = [(f, os.path.splitext(f)[0].upper()) for f in sorted(os.listdir(STORES_DIR)) if f.endswith(".txt")]
+    suburb_lists = {f: gaz.suburbs(state) for f, state in state_files}
+
+    # Progress counts are positions in these lists, so they only carry over if the lists are unchanged
+    changed = [f for f, _ in state_files if not checkpoint.matches(run_id, f, suburb_lists[f])]
+    if changed:
+        print(f"❌ Suburb lists changed since run {run_id} started ({', '.join(changed)}); "
+              "start a new run instead of resuming")
+        checkpoint.close()
+        sys.exit(1)
 
-        state = os.path.splitext(filename)[0].upper()
-        filepath = os.path.join(STORES_DIR, filename)
+    seen = read_written_place_ids(run_output)  # place IDs already written this run
+    total_rows = len(seen)
+    index = PlaceIndex()
+    new_places = 0
+    incomplete = False
+    limiter = TokenBucket(qps)
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
 
-        print(f"\n📍 Processing file: {filename} ({state})")
+    writer = writers.RowWriter(run_output, FIELDNAMES, append=True)
+
+    # Go through each file in the stores folder
+    for filename, state in state_files:
+        suburbs = suburb_lists[filename]
+
+        done = checkpoint.completed(run_id, filename)
+        if done >= len(suburbs):
+            print(f"\n⏭️ Skipping file: {filename} ({state}), already complete")
+            continue
 
-        with open(filepath, "r") as f:
-            suburbs = [line.strip() for line in f if line.strip()]
+        print(f"\n📍 Processing file: {filename} ({state})")
+        if done:
+            print(f"  ⏯️ Resuming after {done} completed suburbs")
 
         state_count = 0  # counter for this state
+        failed = False  # once a suburb fails, stop advancing so a resume retries it
 
-        for suburb in suburbs:
+        # Searches run concurrently; map() yields results in suburb order so the CSV is unchanged
+        results = executor.map(lambda s, state=state: search_suburb(s, limiter, state), suburbs[done:])
+
+        for position, (suburb, (places, error)) in enumerate(zip(suburbs[done:], results), start=done + 1):
             print(f"  🔍 Searching: Bunnings {suburb}")
-            try:
-                results = search_bunnings(suburb)
-                for place in results:
-                    all_rows.append({
-                        "State": state,
-                        "Suburb": suburb,
-                        "Store Name": place.get("displayName", {}).get("text", ""),
-                        "Address": place.get("formattedAddress", ""),
-                        "Store Rating": place.get("rating", ""),
-                        "Total Ratings": place.get("userRatingCount", "")
-                    })
-                    state_count += 1
-            except Exception as e:
-                print(f"  ⚠️ Error fetching {suburb}: {e}")
+            if error:
+                print(f"  ⚠️ Error fetching {suburb}: {error}")
+                failed = True
+                continue
+
+            index.record_suburb(state, suburb, [p["id"] for p in places if p.get("id")])
+
+            for row in place_rows(state, suburb, places, seen):
+                if row["Place ID"]:
+                    if not index.is_known(row["Place ID"]):
+                        new_places += 1
+                    index.record_place(row["Place ID"], row["Store Name"], row["Address"])
+                writer.write(row)
+                state_count += 1
+                total_rows += 1
+
+            # Rows must be on disk before the checkpoint says the suburb is done
+            writer.flush(durable=True)
+            index.commit()
+            if not failed:
+                checkpoint.mark(run_id, filename, position, len(suburbs), suburbs)
 
         print(f"✅ {state_count} stores data written for {state}")
 
-    # Write all collected data to CSV
-    with open(output_file, "w", newline="", encoding="utf-8") as csvfile:
-        fieldnames = ["State", "Suburb", "Store Name", "Address", "Store Rating", "Total Ratings"]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(all_rows)
-
-    print("\n🎉 All data written successfully!")
-    print(f"📦 Total stores in CSV: {len(all_rows)}")
-    print(f"📁 Output file: {output_file}")
+        if failed:
+            incomplete = True
+
+    executor.shutdown()
+    writer.close()
+    index.close()
+    if not incomplete:
+        conn = history.connect()
+        history.ingest_file(conn, run_output)
+        conn.close()
+        # Only now is the run done; if ingesting failed, --resume can finish it
+        checkpoint.finish_run(run_id)
+    checkpoint.close()
+
+    if parquet_dir and not incomplete:
+        dataset = schema.write_parquet(writers.read_rows(run_output), "stores", root=parquet_dir)
+        print(f"🧱 Parquet dataset updated: {dataset}")
+
+    if incomplete:
+        print(f"\n⚠️ Some suburbs failed; rerun with --resume {run_id} to retry them")
+    else:
+        print("\n🎉 All data written successfully!")
+    print(f"📦 Total stores in output: {total_rows} ({new_places} not seen in earlier runs)")
+    print(f"📁 Output file: {run_output}")
 
 if __name__ == "__main__":
-    if not API_KEY:
+    parser = argparse.ArgumentParser(description="Search every suburb in stores/*.txt for Bunnings stores.")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="maximum concurrent searches")
+    parser.add_argument("--qps", type=float, default=PLACES_QPS, help="Places API queries per second (0 = unlimited)")
+    parser.add_argument("--cache", choices=cache.CACHE_MODES, default=cache.CACHE_MODE,
+                        help="response cache: on, refresh (ignore cached entries) or off")
+    parser.add_argument("--resume", nargs="?", const="latest", metavar="RUN_ID",
+                        help="resume the latest unfinished run (or the given run ID)")
+    parser.add_argument("--format", choices=writers.FORMATS, default="csv", help="output format")
+    parser.add_argument("--gzip", action="store_true", help="gzip-compress the output file")
+    parser.add_argument("--parquet", nargs="?", const=schema.PARQUET_ROOT, default=schema.PARQUET_DIR,
+                        metavar="DIR", help="also write a Parquet dataset partitioned by state and run date")
+    args = parser.parse_args()
+    cache.set_mode(args.cache)
+
+    if not keypool.get_pool().keys:
         print("❌ Google API key not found in .env file.")
         sys.exit(1)
-    process_files()
+    process_files(max_workers=args.workers, qps=args.qps, resume=args.resume,
+                  fmt=args.format, compress=args.gzip, parquet_dir=args.parquet)
@@ -0,0 +1,165 @@
+# Benchmark the Places fetchers against the local stub server: throughput, latency and peak memory.
+#
+# Each case runs a real fetcher (app3 text search, app4 search + details, the app5 sweep)
+# through the shared client against stub_server, with the response cache off, and reports
+# requests/s, p50/p99 per-request latency and peak Python memory (tracemalloc).
+import argparse
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import stub_server
+
+CASES = ["app3", "app4", "app5"]
+
+
+class Recorder:
+    """Collects per-attempt latencies and status codes via client.RESPONSE_HOOKS."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.latencies = []
+        self.statuses = {}
+
+    def __call__(self, method, url, response, elapsed):
+        status = response.status_code if response is not None else "error"
+        with self.lock:
+            self.latencies.append(elapsed)
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def run_case(name, fn, recorder):
+    """Time one fetcher run, returning a result dict."""
+    recorder.reset()
+    tracemalloc.start()
+    started = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        items = fn()
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies = list(recorder.latencies)
+    return {
+        "case": name,
+        "items": items,
+        "requests": len(latencies),
+        "seconds": round(seconds, 3),
+        "req_per_s": round(len(latencies) / seconds, 1) if seconds else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "peak_kib": round(peak / 1024, 1),
+        "statuses": {str(k): v for k, v in sorted(recorder.statuses.items(), key=lambda kv: str(kv[0]))},
+    }
+
+
+def bench_app3():
+    import app3
+
+    return sum(1 for _ in app3.iter_bunnings_stores(app3.API_KEY))
+
+
+def bench_app4(suburbs):
+    import app4
+
+    for suburb in suburbs:
+        app4.search_bunnings(suburb, app4.STORE_COLUMNS + app4.REVIEW_COLUMNS)
+    return len(suburbs)
+
+
+def bench_app5(suburbs, workers, qps):
+    import app5
+    from ratelimit import TokenBucket
+
+    limiter = TokenBucket(qps)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        results = list(executor.map(lambda s: app5.search_suburb(s, limiter), suburbs))
+    return sum(len(places) for places, _ in results)
+
+
+def main(args):
+    config = stub_server.StubConfig(stores=args.stores, latency=args.latency, jitter=args.jitter,
+                                    error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+                                    token_delay=args.token_delay)
+    server, url, state = stub_server.start(config)
+
+    # The client reads its API roots at import, so point them at the stub before importing it
+    os.environ["PLACES_API_ROOT"] = url
+    os.environ["MAPS_API_ROOT"] = url
+    os.environ.setdefault("GOOGLE_PLACES_API_KEY", "bench-key")
+    os.environ.setdefault("GOOGLE_PLACES_NEW_API_KEY", "bench-key")
+    # The scripts write output/ and cache/ relative to the working directory
+    workdir = tempfile.mkdtemp(prefix="bunnings_bench_")
+    os.chdir(workdir)
+
+    import cache
+    import client
+
+    cache.set_mode("off")
+    recorder = Recorder()
+    client.RESPONSE_HOOKS.append(recorder)
+
+    suburbs = [f"Suburb{i}" for i in range(min(args.suburbs, args.stores))]
+    cases = {
+        "app3": bench_app3,
+        "app4": lambda: bench_app4(suburbs),
+        "app5": lambda: bench_app5(suburbs, args.workers, args.qps),
+    }
+
+    print(f"🧪 Stub at {url}: {args.stores} stores, {args.latency * 1000:.0f}ms latency, "
+          f"{args.error_rate:.0%} errors, {args.throttle_rate:.0%} throttled")
+    print(f"{'case':<6} {'items':>6} {'reqs':>6} {'secs':>8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'peak KiB':>9}")
+    results = []
+    for name in args.cases:
+        result = run_case(name, cases[name], recorder)
+        results.append(result)
+        print(f"{name:<6} {result['items']:>6} {result['requests']:>6} {result['seconds']:>8.2f} "
+              f"{result['req_per_s']:>8.1f} {result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f} {result['peak_kib']:>9.1f}"
+              f"  {result['statuses']}")
+
+    server.shutdown()
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(config), "results": results}, f, indent=2)
+        print(f"💾 Results saved to {args.json}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Places fetchers against a local stub server.")
+    parser.add_argument("cases", nargs="*", metavar="CASE", help=f"fetchers to run, from {CASES} (default: all)")
+    parser.add_argument("--stores", type=int, default=500, help="fake stores served by the stub")
+    parser.add_argument("--suburbs", type=int, default=100, help="suburbs searched by the app4/app5 cases")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent searches for the app5 case")
+    parser.add_argument("--qps", type=float, default=0, help="rate limit for the app5 case (0 = unlimited)")
+    parser.add_argument("--latency", type=float, default=0.05, help="stub seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.02, help="stub +/- seconds of latency jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered 429")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="seconds before a page token is valid")
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON")
+    args = parser.parse_args()
+    args.cases = args.cases or CASES
+    unknown = set(args.cases) - set(CASES)
+    if unknown:
+        parser.error(f"unknown cases: {sorted(unknown)}")
+    args.json = os.path.abspath(args.json) if args.json else None
+
+    main(args)
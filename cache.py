@@ -0,0 +1,142 @@
+# Persistent on-disk cache for Places API responses, keyed on endpoint + query + field mask.
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from dotenv import load_dotenv
+
+# --- CONFIGURATION ---
+load_dotenv()
+
+CACHE_PATH = os.getenv("BUNNINGS_CACHE_PATH", os.path.join("cache", "places_cache.sqlite"))
+CACHE_TTL = float(os.getenv("BUNNINGS_CACHE_TTL", str(24 * 60 * 60)))  # seconds
+CACHE_MAX_MB = float(os.getenv("BUNNINGS_CACHE_MAX_MB", "512"))
+
+# "on" reads and writes, "refresh" skips reads but stores fresh responses, "off" bypasses the cache
+CACHE_MODES = ("on", "refresh", "off")
+CACHE_MODE = os.getenv("BUNNINGS_CACHE_MODE", "on")
+
+# Credentials never take part in the cache key
+SECRET_PARAMS = {"key"}
+SECRET_HEADERS = {"x-goog-api-key"}
+
+
+def cache_key(method: str, url: str, params: dict = None, body=None, headers: dict = None) -> str:
+    """Content address for a request: everything that changes the response, minus credentials."""
+    field_mask = ""
+    for name, value in (headers or {}).items():
+        if name.lower() == "x-goog-fieldmask":
+            field_mask = value
+    payload = {
+        "method": method.upper(),
+        "url": url,
+        "params": {k: v for k, v in (params or {}).items() if k not in SECRET_PARAMS},
+        "body": body,
+        "field_mask": field_mask,
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed response store with per-entry TTL and size-bounded LRU eviction."""
+
+    def __init__(self, path: str = CACHE_PATH, ttl: float = CACHE_TTL, max_mb: float = CACHE_MAX_MB,
+                 mode: str = CACHE_MODE):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode '{mode}', expected one of {CACHE_MODES}")
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.mode = mode
+        self.lock = threading.Lock()
+        self.conn = None
+
+    def _connect(self):
+        if self.conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, endpoint TEXT, body TEXT, size INTEGER,"
+                " created_at REAL, expires_at REAL, accessed_at REAL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        return self.conn
+
+    def get(self, key: str):
+        """Return the cached JSON for key, or None if missing, expired or bypassed."""
+        if self.mode != "on":
+            return None
+        now = time.time()
+        with self.lock:
+            conn = self._connect()
+            row = conn.execute("SELECT body, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                conn.commit()
+                return None
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+        return json.loads(row[0])
+
+    def put(self, key: str, endpoint: str, data, ttl: float = None):
+        """Store a JSON response and evict least-recently-used entries beyond the size limit."""
+        if self.mode == "off":
+            return
+        body = json.dumps(data, separators=(",", ":"))
+        now = time.time()
+        ttl = self.ttl if ttl is None else ttl
+        with self.lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, endpoint, body, len(body), now, now + ttl, now),
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        conn.execute("DELETE FROM responses WHERE expires_at < ?", (time.time(),))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+
+    def clear(self):
+        """Drop every cached response."""
+        with self.lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+
+
+_cache = None
+
+
+def get_cache() -> ResponseCache:
+    """Return the process-wide cache, creating it from the environment on first use."""
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache()
+    return _cache
+
+
+def set_mode(mode: str):
+    """Switch the process-wide cache between 'on', 'refresh' and 'off'."""
+    if mode not in CACHE_MODES:
+        raise ValueError(f"Unknown cache mode '{mode}', expected one of {CACHE_MODES}")
+    get_cache().mode = mode
@@ -0,0 +1,107 @@
+# Durable progress tracking so an interrupted national sweep can resume where it stopped.
+import hashlib
+import os
+import sqlite3
+import time
+
+from dotenv import load_dotenv
+
+# --- CONFIGURATION ---
+load_dotenv()
+
+CHECKPOINT_PATH = os.getenv("BUNNINGS_CHECKPOINT_PATH", os.path.join("output", "checkpoints.sqlite"))
+
+
+def list_hash(items) -> str:
+    """Fingerprint of an ordered list, so progress counts are only reused against the same list."""
+    return hashlib.sha256("\n".join(items).encode("utf-8")).hexdigest()[:16]
+
+
+class Checkpoint:
+    """Per-run record of the output file and how many suburbs of each state file are complete."""
+
+    def __init__(self, path: str = CHECKPOINT_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                output_file TEXT,
+                started_at REAL,
+                finished_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS progress (
+                run_id TEXT,
+                state_file TEXT,
+                completed INTEGER,
+                total INTEGER,
+                updated_at REAL,
+                list_hash TEXT,
+                PRIMARY KEY (run_id, state_file)
+            );
+            """
+        )
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(progress)")]
+        if "list_hash" not in columns:
+            self.conn.execute("ALTER TABLE progress ADD COLUMN list_hash TEXT")
+            self.conn.commit()
+
+    def start_run(self, run_id: str, output_file: str):
+        """Register a new run and the file it streams rows into."""
+        self.conn.execute(
+            "INSERT INTO runs (run_id, output_file, started_at) VALUES (?, ?, ?)",
+            (run_id, output_file, time.time()),
+        )
+        self.conn.commit()
+
+    def latest_unfinished(self):
+        """(run_id, output_file) of the most recent run that never finished, or None."""
+        return self.conn.execute(
+            "SELECT run_id, output_file FROM runs WHERE finished_at IS NULL ORDER BY started_at DESC LIMIT 1"
+        ).fetchone()
+
+    def get_run(self, run_id: str):
+        """(run_id, output_file) for a specific run, or None."""
+        return self.conn.execute(
+            "SELECT run_id, output_file FROM runs WHERE run_id = ?", (run_id,)
+        ).fetchone()
+
+    def completed(self, run_id: str, state_file: str) -> int:
+        """Number of suburbs at the start of state_file already written for this run."""
+        row = self.conn.execute(
+            "SELECT completed FROM progress WHERE run_id = ? AND state_file = ?", (run_id, state_file)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def matches(self, run_id: str, state_file: str, items) -> bool:
+        """True if state_file's progress for this run was counted against this same list.
+
+        Progress recorded before hashes were kept cannot be checked and never matches.
+        """
+        row = self.conn.execute(
+            "SELECT completed, list_hash FROM progress WHERE run_id = ? AND state_file = ?", (run_id, state_file)
+        ).fetchone()
+        return row is None or row[0] == 0 or row[1] == list_hash(items)
+
+    def mark(self, run_id: str, state_file: str, completed: int, total: int, items=None):
+        """Durably record that the first `completed` suburbs of state_file (the list `items`) are written."""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO progress VALUES (?, ?, ?, ?, ?, ?)",
+            (run_id, state_file, completed, total, time.time(), list_hash(items) if items is not None else None),
+        )
+        self.conn.commit()
+
+    def unfinished_outputs(self) -> set:
+        """Absolute paths of output files whose runs have not finished (still running or crashed)."""
+        rows = self.conn.execute("SELECT output_file FROM runs WHERE finished_at IS NULL")
+        return {os.path.abspath(r[0]) for r in rows}
+
+    def finish_run(self, run_id: str):
+        self.conn.execute("UPDATE runs SET finished_at = ? WHERE run_id = ?", (time.time(), run_id))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
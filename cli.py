@@ -0,0 +1,61 @@
+# Single entry point for every script: `python cli.py <command> [options]`.
+#
+# Each command runs the matching script as if it were launched directly, so options are
+# unchanged (`python cli.py sweep --resume` == `python app5.py --resume`). Only that
+# script's module is imported, which keeps startup cheap for scheduled runs.
+import sys
+import runpy
+
+# command -> (module, description)
+COMMANDS = {
+    "reviews": ("app", "print the reviews of the Bunnings in a suburb"),
+    "export-legacy": ("app2", "save a suburb's reviews to CSV (legacy Places API)"),
+    "stores": ("app3", "list stores via text search queries"),
+    "export": ("app4", "save a suburb's reviews to CSV (Places API New)"),
+    "sweep": ("app5", "search every suburb in stores/*.txt"),
+    "discover": ("discover", "find every store by searching a grid over Australia"),
+    "harvest": ("harvest", "collect reviews for many stores across languages and sorts"),
+    "sync": ("sync", "fetch reviews only for stores whose review count changed"),
+    "analytics": ("analytics", "index review text and query keywords and sentiment"),
+    "history": ("history", "ingest snapshots and query rating trends"),
+    "diff": ("diff", "report new, closed and changed stores between two snapshots"),
+    "cube": ("cube", "build and query the aggregate cube"),
+    "gazetteer": ("gazetteer", "build and query the suburb name gazetteer"),
+    "geometry": ("geometry", "prepare simplified suburb geometry"),
+    "map": ("map", "show the state-level map"),
+    "suburb-map": ("map2", "show a suburb-level map for a state"),
+    "render": ("render", "render every map to static files"),
+    "keys": ("keypool", "show each API key's rate and quota used today"),
+    "plan": ("planner", "show minimal field masks and measure bytes saved"),
+    "metrics": ("metrics", "summarise a request metrics export"),
+    "bench": ("bench", "benchmark the fetchers against the stub server"),
+    "stub": ("stub_server", "run the local Places API stub server"),
+}
+
+
+def usage() -> str:
+    width = max(len(c) for c in COMMANDS)
+    lines = ["Usage: python cli.py <command> [options]", "", "Commands:"]
+    lines += [f"  {command:<{width}}  {description}" for command, (_, description) in COMMANDS.items()]
+    lines += ["", "Run `python cli.py <command> --help` for a command's options."]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return
+    command, rest = argv[0], argv[1:]
+    if command not in COMMANDS:
+        print(f"❌ Unknown command '{command}'\n")
+        print(usage())
+        sys.exit(2)
+
+    module = COMMANDS[command][0]
+    sys.argv = [f"{module}.py"] + rest
+    runpy.run_module(module, run_name="__main__", alter_sys=True)
+
+
+if __name__ == "__main__":
+    main()
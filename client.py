@@ -0,0 +1,157 @@
+# Shared HTTP client: one pooled session with timeouts, retries and backoff for every Places call.
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+import cache
+import metrics
+
+# --- CONFIGURATION ---
+load_dotenv()
+
+# Point these at a local stub server to run the scripts without spending quota
+PLACES_API_ROOT = os.getenv("PLACES_API_ROOT", "https://places.googleapis.com")
+MAPS_API_ROOT = os.getenv("MAPS_API_ROOT", "https://maps.googleapis.com")
+
+TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))  # seconds per request
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "5"))
+BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))  # seconds, doubled per attempt
+BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "30"))
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "32"))  # keep-alive connections per host
+
+# Legacy API "status" values that are safe to serve from the cache
+CACHEABLE_API_STATUSES = {None, "OK", "ZERO_RESULTS"}
+
+# HTTP status codes and API "status" values worth retrying
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+RETRY_API_STATUSES = {"OVER_QUERY_LIMIT", "UNKNOWN_ERROR", "RESOURCE_EXHAUSTED"}
+
+# Called after every HTTP attempt as hook(method, url, response, elapsed_seconds);
+# response is None when the attempt failed to connect or timed out
+RESPONSE_HOOKS = []
+
+# Set by keypool: returns the API key to use for a retry, so a throttled key is not resent
+KEY_PROVIDER = None
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Return the process-wide pooled session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def backoff_delay(attempt: int, retry_after: str = None) -> float:
+    """Exponential backoff with full jitter, honouring a Retry-After header if present."""
+    if retry_after:
+        try:
+            return min(BACKOFF_MAX, float(retry_after))
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def should_retry(response) -> bool:
+    """True for throttling / server errors, including the legacy API's 200 + OVER_QUERY_LIMIT."""
+    if response.status_code in RETRY_STATUS_CODES:
+        return True
+    if response.status_code == 200 and "json" in response.headers.get("Content-Type", ""):
+        try:
+            data = response.json()
+        except ValueError:
+            return False
+        return isinstance(data, dict) and data.get("status") in RETRY_API_STATUSES
+    return False
+
+
+def _notify(method, url, response, elapsed):
+    metrics.record_attempt(url, response, elapsed)
+    for hook in RESPONSE_HOOKS:
+        hook(method, url, response, elapsed)
+
+
+def request(method: str, url: str, timeout: float = None, retries: int = None, rotate_key: bool = True, **kwargs):
+    """Send a request through the shared session, retrying with backoff on transient failures.
+
+    With a KEY_PROVIDER set, retries of Places API (New) calls go out with a freshly acquired
+    X-Goog-Api-Key unless rotate_key is False.
+    """
+    session = get_session()
+    timeout = TIMEOUT if timeout is None else timeout
+    retries = MAX_RETRIES if retries is None else retries
+
+    for attempt in range(retries + 1):
+        retry_after = None
+        response = None
+        started = time.perf_counter()
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            _notify(method, url, None, time.perf_counter() - started)
+            if attempt == retries:
+                raise
+        else:
+            _notify(method, url, response, time.perf_counter() - started)
+            if attempt == retries or not should_retry(response):
+                return response
+            retry_after = response.headers.get("Retry-After")
+
+        metrics.record_retry(url)
+        headers = kwargs.get("headers") or {}
+        rotating = rotate_key and KEY_PROVIDER and "X-Goog-Api-Key" in headers
+        # The pool paces throttled keys itself, so after a 429 another key can go at once
+        if not (rotating and response is not None and response.status_code == 429):
+            time.sleep(backoff_delay(attempt, retry_after))
+        if rotating:
+            # Acquire after the backoff so the key's token is not spent while waiting
+            try:
+                key = KEY_PROVIDER()
+            except Exception as e:
+                last = f"HTTP {response.status_code}" if response is not None else "no response"
+                raise type(e)(f"{e} (while retrying after {last} from {url})") from e
+            kwargs["headers"] = dict(headers, **{"X-Goog-Api-Key": key})
+
+
+def get(url: str, **kwargs):
+    """GET through the shared session."""
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs):
+    """POST through the shared session."""
+    return request("POST", url, **kwargs)
+
+
+def fetch_json(method: str, url: str, params: dict = None, json: dict = None, headers: dict = None,
+               ttl: float = None, **kwargs):
+    """Send a request and return its JSON body, serving repeat requests from the response cache."""
+    store = cache.get_cache()
+    key = cache.cache_key(method, url, params=params, body=json, headers=headers)
+    data = store.get(key)
+    if store.mode == "on":
+        metrics.record_cache(url, data is not None)
+    if data is not None:
+        return data
+
+    response = request(method, url, params=params, json=json, headers=headers, **kwargs)
+    response.raise_for_status()
+    data = response.json()
+
+    if not isinstance(data, dict) or data.get("status") in CACHEABLE_API_STATUSES:
+        store.put(key, url, data, ttl=ttl)
+    return data
@@ -0,0 +1,148 @@
+# Precomputed aggregate cube over the rating history: state and suburb stats per snapshot.
+#
+# Each snapshot is aggregated once when it is ingested. Sums and counts (not means) are
+# stored so plain and rating-weighted averages can both be derived, and rolled up further,
+# from small tables instead of the raw store rows.
+import sys
+import argparse
+
+CUBE_LEVELS = {
+    "state": ["state"],
+    "suburb": ["state", "suburb"],
+}
+
+MEASURES = """
+    COUNT(*) AS store_count,
+    COALESCE(SUM(rating), 0) AS rating_sum,
+    COUNT(rating) AS rating_n,
+    COALESCE(SUM(rating * total_ratings), 0) AS weighted_sum,
+    COALESCE(SUM(CASE WHEN rating IS NOT NULL THEN total_ratings END), 0) AS weight,
+    COALESCE(SUM(total_ratings), 0) AS total_ratings
+"""
+
+
+def ensure_tables(conn):
+    """Create the cube tables if they don't exist."""
+    for level, keys in CUBE_LEVELS.items():
+        key_columns = ", ".join(f"{k} TEXT" for k in keys)
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS cube_{level} ("
+            f" snapshot_id INTEGER, snapshot_date TEXT, {key_columns},"
+            " store_count INTEGER, rating_sum REAL, rating_n INTEGER,"
+            " weighted_sum REAL, weight INTEGER, total_ratings INTEGER,"
+            f" PRIMARY KEY (snapshot_id, {', '.join(keys)}))"
+        )
+        conn.execute(f"CREATE INDEX IF NOT EXISTS cube_{level}_date ON cube_{level} (snapshot_date)")
+
+
+def materialise(conn, snapshot_id: int):
+    """(Re)compute every cube level for one snapshot."""
+    ensure_tables(conn)
+    for level, keys in CUBE_LEVELS.items():
+        key_list = ", ".join(keys)
+        conn.execute(f"DELETE FROM cube_{level} WHERE snapshot_id = ?", (snapshot_id,))
+        conn.execute(
+            f"INSERT INTO cube_{level}"
+            f" SELECT r.snapshot_id, DATE(s.taken_at), {', '.join('UPPER(TRIM(r.' + k + '))' for k in keys)}, {MEASURES}"
+            " FROM store_ratings r JOIN snapshots s ON s.snapshot_id = r.snapshot_id"
+            f" WHERE r.snapshot_id = ? GROUP BY {', '.join('UPPER(TRIM(r.' + k + '))' for k in keys)}",
+            (snapshot_id,),
+        )
+    conn.commit()
+
+
+def update(conn) -> list:
+    """Materialise any snapshots not yet in the cube. Returns the snapshot IDs added."""
+    ensure_tables(conn)
+    missing = [r[0] for r in conn.execute(
+        "SELECT snapshot_id FROM snapshots WHERE snapshot_id NOT IN (SELECT DISTINCT snapshot_id FROM cube_state)"
+        " ORDER BY snapshot_id"
+    )]
+    for snapshot_id in missing:
+        materialise(conn, snapshot_id)
+    return missing
+
+
+def _average(weighted: bool) -> str:
+    if weighted:
+        # Fall back to the plain mean where no store has a rating count
+        return ("CASE WHEN SUM(weight) > 0 THEN SUM(weighted_sum) * 1.0 / SUM(weight)"
+                " ELSE SUM(rating_sum) * 1.0 / NULLIF(SUM(rating_n), 0) END")
+    return "SUM(rating_sum) * 1.0 / NULLIF(SUM(rating_n), 0)"
+
+
+def _latest_snapshot(conn):
+    row = conn.execute("SELECT snapshot_id FROM snapshots ORDER BY taken_at DESC LIMIT 1").fetchone()
+    return row[0] if row else None
+
+
+def stats(conn, level: str = "state", snapshot_id: int = None, state: str = None, weighted: bool = False):
+    """Average_Rating / Store_Count / Total_Ratings per state or suburb for one snapshot (default latest).
+
+    Returns a DataFrame with the same columns as ratings.aggregate, e.g. State, Average_Rating, ...
+    """
+    import pandas as pd
+
+    keys = CUBE_LEVELS[level]
+    snapshot_id = snapshot_id if snapshot_id is not None else _latest_snapshot(conn)
+    where, params = "snapshot_id = ?", [snapshot_id]
+    if state:
+        where += " AND state = ?"
+        params.append(state.upper())
+    key_aliases = ", ".join(f"{k} AS {k.capitalize()}" for k in keys)
+    return pd.read_sql_query(
+        f"SELECT {key_aliases}, {_average(weighted)} AS Average_Rating,"
+        " SUM(store_count) AS Store_Count, SUM(total_ratings) AS Total_Ratings"
+        f" FROM cube_{level} WHERE {where} GROUP BY {', '.join(keys)} ORDER BY {', '.join(keys)}",
+        conn,
+        params=params,
+    )
+
+
+def series(conn, level: str = "state", state: str = None, suburb: str = None, weighted: bool = False):
+    """Daily time series per state or suburb, using the last snapshot of each day."""
+    import pandas as pd
+
+    keys = CUBE_LEVELS[level]
+    where, params = ["c.snapshot_id IN (SELECT MAX(snapshot_id) FROM cube_state GROUP BY snapshot_date)"], []
+    if state:
+        where.append("c.state = ?")
+        params.append(state.upper())
+    if suburb and level == "suburb":
+        where.append("c.suburb = ?")
+        params.append(suburb.upper())
+    key_aliases = ", ".join(f"c.{k} AS {k.capitalize()}" for k in keys)
+    return pd.read_sql_query(
+        f"SELECT c.snapshot_date AS Date, {key_aliases}, {_average(weighted)} AS Average_Rating,"
+        " SUM(c.store_count) AS Store_Count, SUM(c.total_ratings) AS Total_Ratings"
+        f" FROM cube_{level} c WHERE {' AND '.join(where)}"
+        f" GROUP BY c.snapshot_date, {', '.join('c.' + k for k in keys)} ORDER BY c.snapshot_date",
+        conn,
+        params=params,
+    )
+
+
+if __name__ == "__main__":
+    import history
+
+    parser = argparse.ArgumentParser(description="Build and query the aggregate cube over the rating history.")
+    parser.add_argument("command", choices=["update", "rebuild", "show"])
+    parser.add_argument("--level", choices=list(CUBE_LEVELS), default="state")
+    parser.add_argument("--state", help="restrict to one state code")
+    parser.add_argument("--weighted", action="store_true", help="weight average ratings by Total Ratings")
+    args = parser.parse_args()
+
+    conn = history.connect()
+    if args.command == "update":
+        print(f"🧊 Added {len(update(conn))} snapshots to the cube")
+    elif args.command == "rebuild":
+        ids = [r[0] for r in conn.execute("SELECT snapshot_id FROM snapshots")]
+        for snapshot_id in ids:
+            materialise(conn, snapshot_id)
+        print(f"🧊 Rebuilt the cube for {len(ids)} snapshots")
+    else:
+        if _latest_snapshot(conn) is None:
+            print("❌ No snapshots in the history yet")
+            sys.exit(1)
+        print(stats(conn, args.level, state=args.state, weighted=args.weighted).to_string(index=False))
+    conn.close()
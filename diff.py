@@ -0,0 +1,220 @@
+# Change report between two store snapshots: new and closed stores, rating and review-count changes.
+#
+# Snapshots are compared on place ID without loading either one whole. Both files are streamed
+# into hash partitions on disk (by place ID), then each partition pair is compared on its own, so
+# memory is bounded by the partition size rather than the snapshot size. Small snapshots skip the
+# spill and compare in one pass.
+import sys
+import argparse
+import csv
+import heapq
+import os
+import tempfile
+import zlib
+
+import history
+import writers
+
+PARTITION_BYTES = int(float(os.getenv("BUNNINGS_DIFF_PARTITION_MB", "16")) * 1024 * 1024)
+GZIP_RATIO = 6  # rough expansion of gzipped snapshots when sizing partitions
+TOP_N = 10
+
+CHANGE_FIELDS = ["Change", "Place ID", "State", "Store Name", "Old Rating", "New Rating", "Rating Delta",
+                 "Old Total", "New Total", "Total Delta"]
+
+
+def _number(value, cast=float):
+    try:
+        return cast(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _record(row):
+    """(place_id, state, name, rating, total) from a snapshot row."""
+    name = row.get("Store Name", "")
+    address = row.get("Address", "")
+    # Same fallback key as history.py for outputs written before place IDs
+    place_id = row.get("Place ID") or f"{name}|{address}"
+    return (place_id, row.get("State", ""), name,
+            _number(row.get("Store Rating", row.get("Rating"))),
+            _number(row.get("Total Ratings"), int))
+
+
+def partitions_for(path: str) -> int:
+    """Partitions needed to keep each one around PARTITION_BYTES of uncompressed snapshot."""
+    size = os.path.getsize(path) * (GZIP_RATIO if path.endswith(".gz") else 1)
+    return max(1, -(-size // PARTITION_BYTES))
+
+
+def _spill(path: str, directory: str, tag: str, partitions: int) -> list:
+    """Stream a snapshot into `partitions` TSV files by place-ID hash. Returns their paths."""
+    paths = [os.path.join(directory, f"{tag}_{i}.tsv") for i in range(partitions)]
+    files = [open(p, "w", newline="", encoding="utf-8") for p in paths]
+    try:
+        outs = [csv.writer(f, delimiter="\t") for f in files]
+        for row in writers.read_rows(path):
+            record = _record(row)
+            outs[zlib.crc32(record[0].encode("utf-8")) % partitions].writerow(record)
+    finally:
+        for f in files:
+            f.close()
+    return paths
+
+
+def _read_spilled(path: str):
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        for place_id, state, name, rating, total in csv.reader(f, delimiter="\t"):
+            yield (place_id, state, name, float(rating) if rating else None, int(total) if total else None)
+
+
+def _compare(old_records, new_records):
+    """Yield change dicts for one partition; only `old_records` is held in memory."""
+    old = {}
+    for record in old_records:
+        old.setdefault(record[0], record)  # older sweeps can repeat a store; keep the first row
+    seen = set()
+    for place_id, state, name, rating, total in new_records:
+        if place_id in seen:
+            continue
+        seen.add(place_id)
+        before = old.pop(place_id, None)
+        if before is None:
+            yield _change("new", place_id, state, name, None, rating, None, total)
+            continue
+        if before[3] != rating or before[4] != total:
+            yield _change("changed", place_id, state, name, before[3], rating, before[4], total)
+    for place_id, state, name, rating, total in old.values():
+        yield _change("closed", place_id, state, name, rating, None, total, None)
+
+
+def _change(kind, place_id, state, name, old_rating, new_rating, old_total, new_total):
+    rating_delta = round(new_rating - old_rating, 2) if None not in (old_rating, new_rating) else None
+    total_delta = new_total - old_total if None not in (old_total, new_total) else None
+    return {
+        "Change": kind, "Place ID": place_id, "State": state, "Store Name": name,
+        "Old Rating": old_rating, "New Rating": new_rating, "Rating Delta": rating_delta,
+        "Old Total": old_total, "New Total": new_total, "Total Delta": total_delta,
+    }
+
+
+def diff(old_path: str, new_path: str, partitions: int = None):
+    """Yield one change dict per new, closed or changed store between two snapshot files.
+
+    Changes come out grouped by partition, not in any particular order.
+    """
+    partitions = partitions or max(partitions_for(old_path), partitions_for(new_path))
+    if partitions == 1:
+        yield from _compare((_record(r) for r in writers.read_rows(old_path)),
+                            (_record(r) for r in writers.read_rows(new_path)))
+        return
+    with tempfile.TemporaryDirectory(prefix="bunnings_diff_") as directory:
+        old_parts = _spill(old_path, directory, "old", partitions)
+        new_parts = _spill(new_path, directory, "new", partitions)
+        for old_part, new_part in zip(old_parts, new_parts):
+            yield from _compare(_read_spilled(old_part), _read_spilled(new_part))
+
+
+def summarise(changes, top: int = TOP_N) -> dict:
+    """Counts per change type and state, plus the largest moves, keeping only `top` rows of each."""
+    summary = {"new": [], "closed": [], "changed": 0, "rating_changed": 0, "total_changed": 0,
+               "by_state": {}, "rating_up": [], "rating_down": [], "total_up": [], "total_down": []}
+    counts = {"new": 0, "closed": 0}
+    for change in changes:
+        kind = change["Change"]
+        state = summary["by_state"].setdefault(change["State"] or "?", {"new": 0, "closed": 0, "changed": 0})
+        state[kind] += 1
+        if kind in counts:
+            counts[kind] += 1
+            if len(summary[kind]) < top:
+                summary[kind].append(change)
+            continue
+        summary["changed"] += 1
+        key = (change["State"], change["Place ID"])
+        for delta_field, field, up, down in (("Rating Delta", "rating_changed", "rating_up", "rating_down"),
+                                             ("Total Delta", "total_changed", "total_up", "total_down")):
+            delta = change[delta_field]
+            if not delta:
+                continue
+            summary[field] += 1
+            # Bounded heaps: (|delta|, tiebreak, change) keeps the `top` biggest moves each way
+            heap = summary[up if delta > 0 else down]
+            item = (abs(delta), key, change)
+            if len(heap) < top:
+                heapq.heappush(heap, item)
+            elif item[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, item)
+    for name in ("rating_up", "rating_down", "total_up", "total_down"):
+        summary[name] = [c for _, _, c in sorted(summary[name], key=lambda i: i[:2], reverse=True)]
+    summary["new_count"], summary["closed_count"] = counts["new"], counts["closed"]
+    return summary
+
+
+def latest_two(pattern: str = history.SNAPSHOT_GLOB, kind: str = ""):
+    """The two most recent finished snapshots of one kind ("" = suburb sweeps), oldest first.
+
+    An unfinished sweep would report every suburb not yet searched as closed, and a grid
+    discovery is not comparable with a suburb sweep.
+    """
+    paths = history.latest_snapshots(2, pattern, kind=kind)
+    return paths if len(paths) == 2 else None
+
+
+def print_report(summary, old_path, new_path):
+    print(f"🔁 {os.path.basename(old_path)} → {os.path.basename(new_path)}")
+    print(f"  🆕 {summary['new_count']} new   🚪 {summary['closed_count']} closed   "
+          f"⭐ {summary['rating_changed']} rating changes   💬 {summary['total_changed']} review-count changes")
+    for kind, icon in (("new", "🆕"), ("closed", "🚪")):
+        if summary[kind]:
+            more = summary[f"{kind}_count"] - len(summary[kind])
+            print(f"\n{icon} {kind.capitalize()} stores{f' (first {len(summary[kind])}, {more} more)' if more > 0 else ''}:")
+            for c in summary[kind]:
+                print(f"  {c['State']:<4} {c['Store Name']}")
+    sections = (("rating_down", "📉 Biggest rating drops", "Old Rating", "New Rating", "Rating Delta"),
+                ("rating_up", "📈 Biggest rating gains", "Old Rating", "New Rating", "Rating Delta"),
+                ("total_up", "💬 Most new reviews", "Old Total", "New Total", "Total Delta"),
+                ("total_down", "⚠️ Review counts that fell", "Old Total", "New Total", "Total Delta"))
+    for name, title, old_field, new_field, delta_field in sections:
+        if summary[name]:
+            print(f"\n{title}:")
+            for c in summary[name]:
+                print(f"  {c['State']:<4} {c['Store Name']}: {c[old_field]} → {c[new_field]} ({c[delta_field]:+g})")
+    changed_states = {s: v for s, v in summary["by_state"].items() if any(v.values())}
+    if changed_states:
+        print("\n🗺️ By state:")
+        for state, v in sorted(changed_states.items()):
+            print(f"  {state:<4} +{v['new']} / -{v['closed']} / {v['changed']} changed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report changes between two store snapshots, keyed on place ID.")
+    parser.add_argument("old", nargs="?", help="older snapshot (default: second latest output/bunnings_stores_*)")
+    parser.add_argument("new", nargs="?", help="newer snapshot (default: latest)")
+    parser.add_argument("--kind", default="", choices=["", "discover"],
+                        help='run type compared by default: "" for suburb sweeps, "discover" for grid runs')
+    parser.add_argument("--top", type=int, default=TOP_N, help="rows to show per section")
+    parser.add_argument("--output", help="also write every change to this CSV/NDJSON file")
+    parser.add_argument("--partitions", type=int, help="hash partitions (default: sized from the snapshots)")
+    args = parser.parse_args()
+
+    if bool(args.old) != bool(args.new):
+        parser.error("give both snapshots or neither")
+    paths = [args.old, args.new] if args.old else latest_two(kind=args.kind)
+    if not paths:
+        print("❌ Need two snapshots; none given and fewer than two finished output/bunnings_stores_* runs found.")
+        sys.exit(1)
+    old_path, new_path = paths
+
+    changes = diff(old_path, new_path, args.partitions)
+    if args.output:
+        with writers.RowWriter(args.output, CHANGE_FIELDS) as writer:
+            def tee(rows):
+                for row in rows:
+                    writer.write(row)
+                    yield row
+            summary = summarise(tee(changes), args.top)
+    else:
+        summary = summarise(changes, args.top)
+    print_report(summary, old_path, new_path)
+    if args.output:
+        print(f"\n📁 All changes: {args.output}")
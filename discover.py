@@ -0,0 +1,205 @@
+# Discover every Bunnings store by tiling Australia into searchText locationRestriction rectangles.
+#
+# A text query tops out at 60 results and the suburb lists in stores/*.txt need hand upkeep.
+# Instead each grid cell is searched on its own; a cell that fills a whole page may hold more
+# stores, so it is split into quadrants and searched again, recursing only where stores are dense.
+# Cells run concurrently behind the shared rate limiter and stores are deduplicated by place ID.
+import sys
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+import cache
+import client
+import history
+import keypool
+import planner
+from placeindex import PlaceIndex
+from ratelimit import TokenBucket
+import schema
+import writers
+
+# --- CONFIGURATION ---
+load_dotenv()
+SEARCH_URL = f"{client.PLACES_API_ROOT}/v1/places:searchText"
+SEARCH_QUERY = "Bunnings Warehouse"
+OUTPUT_DIR = "output"
+
+MAX_WORKERS = int(os.getenv("BUNNINGS_MAX_WORKERS", "8"))
+PLACES_QPS = float(os.getenv("PLACES_QPS", "10"))
+
+# South, west, north, east bounds of mainland Australia and Tasmania
+AUSTRALIA = (-44.0, 112.5, -10.0, 154.0)
+GRID_ROWS, GRID_COLS = 4, 4  # starting grid before any subdivision
+PAGE_SIZE = 20  # searchText maximum; a full page means the cell may hold more stores
+MAX_DEPTH = 8  # stop splitting here (cells of ~0.03 degrees) and paginate instead
+
+FIELDNAMES = ["Place ID", "State", "Suburb", "Store Name", "Address", "Store Rating", "Total Ratings",
+              "Latitude", "Longitude"]
+FIELD_MASK = planner.search_mask(FIELDNAMES, paginate=True)
+
+
+def grid(bounds=AUSTRALIA, rows=GRID_ROWS, cols=GRID_COLS):
+    """Split (south, west, north, east) bounds into rows x cols cells at depth 0."""
+    south, west, north, east = bounds
+    height, width = (north - south) / rows, (east - west) / cols
+    return [(south + r * height, west + c * width, south + (r + 1) * height, west + (c + 1) * width, 0)
+            for r in range(rows) for c in range(cols)]
+
+
+def split(cell):
+    """The four quadrants of a cell, one level deeper."""
+    south, west, north, east, depth = cell
+    mid_lat, mid_lng = (south + north) / 2, (west + east) / 2
+    return [
+        (south, west, mid_lat, mid_lng, depth + 1),
+        (south, mid_lng, mid_lat, east, depth + 1),
+        (mid_lat, west, north, mid_lng, depth + 1),
+        (mid_lat, mid_lng, north, east, depth + 1),
+    ]
+
+
+def search_cell(cell, limiter=None):
+    """Search one cell. Returns (places, calls, full, error).
+
+    full is True when the first page came back full and the cell should be split.
+    At MAX_DEPTH the remaining pages are followed instead.
+    """
+    south, west, north, east, depth = cell
+    body = {
+        "textQuery": SEARCH_QUERY,
+        "pageSize": PAGE_SIZE,
+        "locationRestriction": {"rectangle": {
+            "low": {"latitude": south, "longitude": west},
+            "high": {"latitude": north, "longitude": east},
+        }},
+    }
+    places, calls = [], 0
+    try:
+        # A spent key pool (QuotaExhausted) fails just this cell
+        headers = {
+            "Content-Type": "application/json",
+            "X-Goog-Api-Key": keypool.get_pool().acquire(),
+            "X-Goog-FieldMask": FIELD_MASK,
+        }
+        while True:
+            if limiter:
+                limiter.acquire()
+            # Page tokens stay with the key that issued them, so follow-up pages keep the first key
+            data = client.fetch_json("POST", SEARCH_URL, headers=headers, json=body, rotate_key="pageToken" not in body)
+            calls += 1
+            page = data.get("places", [])
+            places += page
+            if len(page) >= PAGE_SIZE and depth < MAX_DEPTH and calls == 1:
+                return places, calls, True, None
+            token = data.get("nextPageToken")
+            if not token:
+                return places, calls, False, None
+            body = dict(body, pageToken=token)
+    except Exception as e:
+        return places, calls, False, e
+
+
+def store_row(place):
+    address = place.get("formattedAddress", "")
+    return {
+        "Place ID": place.get("id", ""),
+        "State": schema.state_from_address(address),
+        "Suburb": "",  # map2 places stores in suburbs from their coordinates
+        "Store Name": place.get("displayName", {}).get("text", ""),
+        "Address": address,
+        "Store Rating": place.get("rating", ""),
+        "Total Ratings": place.get("userRatingCount", ""),
+        "Latitude": place.get("location", {}).get("latitude", ""),
+        "Longitude": place.get("location", {}).get("longitude", ""),
+    }
+
+
+def discover(output_file, max_workers=MAX_WORKERS, qps=PLACES_QPS, bounds=AUSTRALIA, rows=GRID_ROWS, cols=GRID_COLS):
+    """Tile `bounds`, subdividing full cells, and stream unique stores to output_file.
+
+    Returns the number of stores written, or None if some cells failed.
+    """
+    limiter = TokenBucket(qps)
+    index = PlaceIndex()
+    seen = set()
+    calls = cells = splits = failed = 0
+    deepest = 0
+
+    print(f"🗺️ Discovering stores over a {rows}x{cols} grid...")
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor, \
+            writers.RowWriter(output_file, FIELDNAMES) as writer:
+        pending = {executor.submit(search_cell, cell, limiter): cell for cell in grid(bounds, rows, cols)}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                cell = pending.pop(future)
+                places, used, full, error = future.result()
+                calls += used
+                cells += 1
+                deepest = max(deepest, cell[4])
+                if error:
+                    failed += 1
+                    print(f"  ⚠️ Cell {cell[:4]} failed: {error}")
+                    continue
+                if full:
+                    # Dense cell: its quadrants will find these stores again, plus any beyond the first page
+                    splits += 1
+                    pending.update({executor.submit(search_cell, child, limiter): child for child in split(cell)})
+                    continue
+                for place in places:
+                    place_id = place.get("id")
+                    if not place_id or place_id in seen:
+                        continue
+                    seen.add(place_id)
+                    row = store_row(place)
+                    index.record_place(place_id, row["Store Name"], row["Address"])
+                    writer.write(row)
+            writer.flush()
+            index.commit()
+
+    index.close()
+    print(f"✅ {len(seen)} unique stores from {calls} searches over {cells} cells "
+          f"({splits} split, deepest level {deepest})")
+    if failed:
+        print(f"⚠️ {failed} cells failed; the store list may be incomplete")
+        return None
+    return len(seen)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find every Bunnings store by searching an adaptive grid over Australia.")
+    parser.add_argument("--output", help="output file (default: output/bunnings_stores_<timestamp>_discover.csv)")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="maximum concurrent searches")
+    parser.add_argument("--qps", type=float, default=PLACES_QPS, help="Places API queries per second (0 = unlimited)")
+    parser.add_argument("--grid", type=int, nargs=2, default=[GRID_ROWS, GRID_COLS], metavar=("ROWS", "COLS"),
+                        help="starting grid size")
+    parser.add_argument("--cache", choices=cache.CACHE_MODES, default=cache.CACHE_MODE,
+                        help="response cache: on, refresh (ignore cached entries) or off")
+    args = parser.parse_args()
+    cache.set_mode(args.cache)
+
+    if not keypool.get_pool().keys:
+        print("❌ Google API key not found in .env file.")
+        sys.exit(1)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_file = args.output or os.path.join(OUTPUT_DIR, f"bunnings_stores_{timestamp}_discover.csv")
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+
+    # Write under a hidden name until done, so history/diff never pick up a half-finished discovery
+    directory, name = os.path.split(output_file)
+    partial = os.path.join(directory, f".{name}")
+    found = discover(partial, args.workers, args.qps, rows=args.grid[0], cols=args.grid[1])
+    if found is None:
+        # Missing cells would make their stores look closed; keep the partial list out of snapshots
+        print(f"📁 Incomplete store list kept at {partial}")
+        sys.exit(1)
+    os.replace(partial, output_file)
+    conn = history.connect()
+    history.ingest_file(conn, output_file)
+    conn.close()
+    print(f"📁 Output file: {output_file}")
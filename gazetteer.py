@@ -0,0 +1,275 @@
+# Compiled suburb gazetteer: canonical names, state, aliases and postcodes in one lookup table.
+#
+# Built once from stores/<state>.txt and data/suburb-2-<state>.geojson into
+# data/cache/gazetteer.sqlite, and rebuilt when any source changes. Spellings that only
+# differ in case, punctuation or abbreviation ("St Kilda", "SAINT KILDA", "Mt Eliza") share
+# an alias key, so sweeps search each suburb once and map joins are plain dict lookups.
+import sys
+import argparse
+import json
+import os
+import re
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+
+import geometry
+
+STORES_DIR = "stores"
+GAZETTEER_PATH = os.path.join(geometry.CACHE_DIR, "gazetteer.sqlite")
+MAX_WORKERS = int(os.getenv("BUNNINGS_MAX_WORKERS", "8"))
+
+# Abbreviations expanded when building alias keys (ST only at the start: "ST KILDA", not "JAMES ST")
+LEADING_ABBREVIATIONS = {"ST": "SAINT"}
+ABBREVIATIONS = {"MT": "MOUNT", "PT": "PORT", "NTH": "NORTH", "STH": "SOUTH", "UPR": "UPPER", "LWR": "LOWER"}
+POSTCODE = re.compile(r"[\s,]+(\d{4})$")
+VERSION = 2  # bump when the compiled layout or contents change, to force a rebuild
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS suburbs (
+    state TEXT,
+    name TEXT,          -- canonical name, as keyed in the geometry cache
+    display TEXT,       -- spelling used for searches: the stores/<state>.txt line, postcode included
+    postcode TEXT,
+    has_geometry INTEGER,
+    listed INTEGER,     -- position in stores/<state>.txt, or NULL if not listed
+    PRIMARY KEY (state, name)
+);
+CREATE TABLE IF NOT EXISTS aliases (
+    state TEXT,
+    alias TEXT,
+    name TEXT,
+    PRIMARY KEY (state, alias)
+);
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    mtime REAL
+);
+"""
+
+
+def alias_key(name) -> str:
+    """Spelling-insensitive key: upper-case, no punctuation or "(qualifier)", abbreviations expanded."""
+    key = re.sub(r"\(.*?\)", " ", str(name).upper())
+    key = re.sub(r"[-/]", " ", key)
+    words = re.sub(r"[^A-Z0-9 ]", "", key).split()
+    if words and words[0] in LEADING_ABBREVIATIONS:
+        words[0] = LEADING_ABBREVIATIONS[words[0]]
+    return " ".join(ABBREVIATIONS.get(w, w) for w in words)
+
+
+def split_postcode(line: str):
+    """("Richmond", "3121") from "Richmond 3121" or "Richmond, 3121"; postcode is "" if absent."""
+    match = POSTCODE.search(line)
+    if match:
+        return line[:match.start()].strip(), match.group(1)
+    return line.strip(), ""
+
+
+def sources() -> list:
+    """(kind, state, path) for every stores list and suburb GeoJSON on disk."""
+    found = []
+    if os.path.isdir(STORES_DIR):
+        for filename in sorted(os.listdir(STORES_DIR)):
+            if filename.endswith(".txt"):
+                found.append(("stores", os.path.splitext(filename)[0].upper(), os.path.join(STORES_DIR, filename)))
+    for state in geometry.STATE_CODES:
+        path = geometry.source_path(state)
+        if os.path.exists(path):
+            found.append(("geojson", state, path))
+    return found
+
+
+def _read_source(source):
+    """[(name, postcode, display)] from one source file; runs in a worker process."""
+    kind, state, path = source
+    if kind == "stores":
+        with open(path, "r") as f:
+            # The whole line is still the search text: "Richmond 3121" finds the right Richmond
+            return [(*split_postcode(line), line.strip()) for line in f if line.strip()]
+
+    with open(path, "r") as f:
+        features = json.load(f).get("features", [])
+    if not features:
+        return []
+    properties = features[0].get("properties", {})
+    name_column = f"{state.lower()}_local_2"
+    if name_column not in properties:
+        name_column = next((c for c in properties if c.endswith("_local_2")), None)
+    if name_column is None:
+        raise KeyError(f"No suburb name column found in {path}")
+    postcode_column = next((c for c in properties if "postcode" in c.lower()), None)
+    names = []
+    for feature in features:
+        props = feature.get("properties") or {}
+        if props.get(name_column):
+            postcode = str(props.get(postcode_column) or "") if postcode_column else ""
+            names.append((props[name_column], postcode, str(props[name_column]).strip()))
+    return names
+
+
+def compile_entries(read) -> tuple:
+    """Merge source contents into (suburbs, aliases) rows.
+
+    `read` is [((kind, state, path), [(name, postcode, display)])]. Geometry names become canonical,
+    so a listed suburb maps onto its polygon whenever the alias keys agree.
+    """
+    suburbs = {}  # (state, name) -> [display, postcode, has_geometry, listed]
+    aliases = {}  # (state, alias) -> name
+    # Geometry first so its spellings win; stores lists then attach to them
+    for (kind, state, _), names in sorted(read, key=lambda r: r[0][0] != "geojson"):
+        for position, (raw, postcode, display) in enumerate(names):
+            key = alias_key(raw)
+            if not key:
+                continue
+            name = aliases.setdefault((state, key), geometry.normalise_name(raw))
+            aliases.setdefault((state, geometry.normalise_name(raw)), name)
+            entry = suburbs.setdefault((state, name), [display, "", 0, None])
+            if postcode and not entry[1]:
+                entry[1] = postcode
+            if kind == "geojson":
+                entry[2] = 1
+            elif entry[3] is None:
+                entry[0] = display  # search with the listed line
+                entry[3] = position
+    suburb_rows = [(state, name, *entry) for (state, name), entry in suburbs.items()]
+    alias_rows = [(state, alias, name) for (state, alias), name in aliases.items()]
+    return suburb_rows, alias_rows
+
+
+def build(path=GAZETTEER_PATH, max_workers=MAX_WORKERS) -> tuple:
+    """Read every source (GeoJSON files in parallel processes) and write the gazetteer.
+
+    Returns (suburbs, aliases) counts.
+    """
+    found = sources()
+    if len(found) > 1 and max_workers > 1:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(found))) as executor:
+            read = list(zip(found, executor.map(_read_source, found)))
+    else:
+        read = [(source, _read_source(source)) for source in found]
+    suburb_rows, alias_rows = compile_entries(read)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    with conn:
+        conn.execute(f"PRAGMA user_version = {VERSION}")
+        conn.execute("DELETE FROM suburbs")
+        conn.execute("DELETE FROM aliases")
+        conn.execute("DELETE FROM sources")
+        conn.executemany("INSERT INTO suburbs VALUES (?, ?, ?, ?, ?, ?)", suburb_rows)
+        conn.executemany("INSERT INTO aliases VALUES (?, ?, ?)", alias_rows)
+        conn.executemany("INSERT INTO sources VALUES (?, ?)", [(p, os.path.getmtime(p)) for _, _, p in found])
+    conn.close()
+    return len(suburb_rows), len(alias_rows)
+
+
+def is_stale(path=GAZETTEER_PATH) -> bool:
+    """True when the gazetteer is missing, from an older VERSION, or a source file was added, removed or modified."""
+    if not os.path.exists(path):
+        return True
+    conn = sqlite3.connect(path)
+    try:
+        if conn.execute("PRAGMA user_version").fetchone()[0] != VERSION:
+            return True
+        recorded = dict(conn.execute("SELECT path, mtime FROM sources"))
+    except sqlite3.OperationalError:
+        return True
+    finally:
+        conn.close()
+    current = {p: os.path.getmtime(p) for _, _, p in sources()}
+    return recorded != current
+
+
+class Gazetteer:
+    """In-memory view of the gazetteer: every lookup is a dict access."""
+
+    def __init__(self, path=GAZETTEER_PATH):
+        conn = sqlite3.connect(path)
+        self.aliases = {(state, alias): name for state, alias, name in conn.execute("SELECT * FROM aliases")}
+        self.entries = {}
+        self.listed = {}  # state -> [display names in stores-file order]
+        rows = conn.execute(
+            "SELECT state, name, display, postcode, has_geometry, listed FROM suburbs ORDER BY state, listed"
+        )
+        for state, name, display, postcode, has_geometry, listed in rows:
+            self.entries[(state, name)] = (display, postcode, bool(has_geometry))
+            if listed is not None:
+                self.listed.setdefault(state, []).append(display)
+        conn.close()
+
+    def canonical(self, state, name) -> str:
+        """Canonical name for a spelling in a state; unknown names are only normalised."""
+        state = str(state).upper()
+        normalised = geometry.normalise_name(name)
+        found = self.aliases.get((state, normalised))
+        if found is None:
+            found = self.aliases.get((state, alias_key(name)), normalised)
+        return found
+
+    def postcode(self, state, name) -> str:
+        entry = self.entries.get((str(state).upper(), self.canonical(state, name)))
+        return entry[1] if entry else ""
+
+    def suburbs(self, state) -> list:
+        """Suburbs listed in stores/<state>.txt, one spelling per canonical suburb, in file order."""
+        return list(self.listed.get(str(state).upper(), []))
+
+
+_gazetteer = None
+
+
+def load(path=GAZETTEER_PATH, rebuild: bool = False) -> Gazetteer:
+    """The gazetteer, rebuilt first if its sources changed; cached for the process."""
+    global _gazetteer
+    if rebuild or is_stale(path):
+        build(path)
+        _gazetteer = None
+    if _gazetteer is None:
+        _gazetteer = Gazetteer(path)
+    return _gazetteer
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build and query the suburb gazetteer.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("build", help="compile stores/*.txt and the suburb GeoJSONs")
+    p.add_argument("--workers", type=int, default=MAX_WORKERS, help="processes reading GeoJSON files")
+
+    p = sub.add_parser("lookup", help="canonical name and postcode for some spellings")
+    p.add_argument("state")
+    p.add_argument("names", nargs="+")
+
+    p = sub.add_parser("duplicates", help="list spellings in stores/*.txt that resolve to the same suburb")
+    p.add_argument("states", nargs="*")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        if not sources():
+            print(f"❌ No sources found in {STORES_DIR}/ or {geometry.DATA_DIR}/")
+            sys.exit(1)
+        suburbs, aliases = build(max_workers=args.workers)
+        print(f"📚 {suburbs} suburbs and {aliases} aliases written to {GAZETTEER_PATH}")
+        sys.exit(0)
+
+    gaz = load()
+    if args.command == "lookup":
+        for name in args.names:
+            canonical = gaz.canonical(args.state, name)
+            known = (args.state.upper(), canonical) in gaz.entries
+            postcode = gaz.postcode(args.state, name)
+            print(f"{name} -> {canonical}{f' {postcode}' if postcode else ''}{'' if known else '  (not in gazetteer)'}")
+    else:
+        for _, state, path in sources():
+            if not path.endswith(".txt") or (args.states and state not in [s.upper() for s in args.states]):
+                continue
+            groups = {}
+            with open(path, "r") as f:
+                for line in f:
+                    if line.strip():
+                        name = split_postcode(line)[0]
+                        groups.setdefault(gaz.canonical(state, name), []).append(name)
+            for canonical, names in groups.items():
+                if len(names) > 1:
+                    print(f"{state}  {canonical}: {', '.join(names)}")
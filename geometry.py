@@ -0,0 +1,95 @@
+# Prepare and cache simplified suburb polygons so maps don't re-read full GeoJSON every run.
+#
+# The raw data/suburb-2-<state>.geojson files are simplified once per tolerance and
+# stored as GeoParquet under data/cache/, keyed by a normalised SUBURB_NAME column.
+import sys
+import argparse
+import os
+import re
+
+DATA_DIR = "data"
+CACHE_DIR = os.path.join(DATA_DIR, "cache")
+STATE_CODES = ["NSW", "VIC", "QLD", "SA", "WA", "TAS", "ACT", "NT"]
+
+# Degrees; ~50 m keeps suburb shapes recognisable at state zoom while dropping most vertices
+DEFAULT_TOLERANCE = float(os.getenv("BUNNINGS_SIMPLIFY_TOLERANCE", "0.0005"))
+
+
+def normalise_name(name) -> str:
+    """Canonical join key for a suburb name: trimmed, upper-case, single-spaced."""
+    return re.sub(r"\s+", " ", str(name)).strip().upper()
+
+
+def source_path(state_code: str) -> str:
+    return os.path.join(DATA_DIR, f"suburb-2-{state_code.lower()}.geojson")
+
+
+def cache_path(state_code: str, tolerance: float) -> str:
+    return os.path.join(CACHE_DIR, f"suburbs_{state_code.lower()}_{tolerance:g}.parquet")
+
+
+def _name_column(gdf, state_code: str) -> str:
+    """The suburb-name field of a state file, e.g. sa_local_2 for SA."""
+    preferred = f"{state_code.lower()}_local_2"
+    if preferred in gdf.columns:
+        return preferred
+    for column in gdf.columns:
+        if column.endswith("_local_2"):
+            return column
+    raise KeyError(f"No suburb name column found in {source_path(state_code)}")
+
+
+def prepare_suburbs(state_code: str, tolerance: float = DEFAULT_TOLERANCE):
+    """Simplify one state's suburb polygons and write them to the GeoParquet cache."""
+    import geopandas as gpd
+
+    gdf = gpd.read_file(source_path(state_code))
+    gdf = gdf[[_name_column(gdf, state_code), "geometry"]].rename(
+        columns={_name_column(gdf, state_code): "SUBURB_NAME"}
+    )
+    gdf["SUBURB_NAME"] = gdf["SUBURB_NAME"].map(normalise_name)
+    gdf["STATE"] = state_code.upper()
+    if tolerance > 0:
+        gdf["geometry"] = gdf.geometry.simplify(tolerance, preserve_topology=True)
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    gdf.to_parquet(cache_path(state_code, tolerance))
+    return gdf
+
+
+def load_suburbs(state_code: str, tolerance: float = DEFAULT_TOLERANCE, rebuild: bool = False):
+    """Simplified suburb polygons for a state ("ALL" for every state), from the cache when fresh."""
+    import geopandas as gpd
+    import pandas as pd
+
+    if state_code.upper() == "ALL":
+        states = [s for s in STATE_CODES if os.path.exists(source_path(s))]
+        frames = [load_suburbs(s, tolerance, rebuild) for s in states]
+        return gpd.GeoDataFrame(pd.concat(frames, ignore_index=True), crs=frames[0].crs if frames else None)
+
+    cached = cache_path(state_code, tolerance)
+    source = source_path(state_code)
+    stale = not os.path.exists(cached) or (
+        os.path.exists(source) and os.path.getmtime(source) > os.path.getmtime(cached)
+    )
+    if rebuild or stale:
+        return prepare_suburbs(state_code, tolerance)
+    return gpd.read_parquet(cached)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the simplified suburb geometry cache.")
+    parser.add_argument("states", nargs="*", help="state codes (default: every state with a GeoJSON file)")
+    parser.add_argument("--tolerance", type=float, action="append",
+                        help=f"simplification tolerance in degrees, repeatable (default {DEFAULT_TOLERANCE:g})")
+    args = parser.parse_args()
+
+    states = [s.upper() for s in args.states] or [s for s in STATE_CODES if os.path.exists(source_path(s))]
+    if not states:
+        print(f"❌ No suburb GeoJSON files found in {DATA_DIR}/")
+        sys.exit(1)
+
+    for state in states:
+        for tolerance in args.tolerance or [DEFAULT_TOLERANCE]:
+            gdf = prepare_suburbs(state, tolerance)
+            print(f"🗺️  {state}: {len(gdf)} suburbs cached at {cache_path(state, tolerance)}")
@@ -0,0 +1,153 @@
+# Harvest every obtainable Google review for many Bunnings stores into one dataset.
+#
+# The Places APIs return at most five reviews per call, so each store is queried
+# once per language (new API) and once per sort order and language (legacy API).
+# The results are merged and de-duplicated by author + publish time.
+import sys
+import argparse
+import os
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+
+import app2
+import app4
+import keypool
+from placeindex import PlaceIndex
+from ratelimit import TokenBucket
+from schema import normalise_new_review, normalise_legacy_review
+import writers
+
+# --- CONFIGURATION ---
+load_dotenv()
+
+LEGACY_API_KEY = os.getenv("GOOGLE_PLACES_API_KEY")  # enables the legacy sort-order variants
+LANGUAGES = [lang.strip() for lang in os.getenv("BUNNINGS_REVIEW_LANGUAGES", "en").split(",") if lang.strip()]
+LEGACY_SORTS = ["most_relevant", "newest"]
+MAX_WORKERS = int(os.getenv("BUNNINGS_MAX_WORKERS", "8"))
+PLACES_QPS = float(os.getenv("PLACES_QPS", "10"))
+DETAILS_MAX_AGE = float(os.getenv("BUNNINGS_DETAILS_MAX_AGE", str(24 * 60 * 60)))  # seconds
+
+OUTPUT_DIR = "output"
+
+FIELDNAMES = [
+    "Place ID", "State", "Store Name", "Store Rating", "Total Ratings",
+    "Author", "Rating", "Publish Time", "Language", "Text", "Source",
+]
+
+
+def review_key(row: dict):
+    """Identity of a review across API variants."""
+    return (row["Author"].strip().lower(), row["Publish Time"])
+
+
+def harvest_place(place_id: str, limiter=None, languages=LANGUAGES, legacy_key=LEGACY_API_KEY):
+    """Collect and de-duplicate all reviews reachable for one place. Returns (store, reviews)."""
+    store = {"Store Name": "", "Store Rating": "", "Total Ratings": ""}
+    merged = {}
+
+    def add(rows):
+        for row in rows:
+            merged.setdefault(review_key(row), row)
+
+    for language in languages:
+        if limiter:
+            limiter.acquire()
+        name, rating, total, reviews = app4.get_reviews(place_id, language=language)
+        store = {"Store Name": name, "Store Rating": rating, "Total Ratings": total}
+        add(normalise_new_review(r) for r in reviews)
+
+        if not legacy_key:
+            continue
+        for sort in LEGACY_SORTS:
+            if limiter:
+                limiter.acquire()
+            result, legacy_reviews = app2.get_bunnings_reviews(place_id, legacy_key, sort=sort, language=language)
+            if result is not None:
+                add(normalise_legacy_review(r) for r in legacy_reviews)
+
+    reviews = sorted(merged.values(), key=lambda r: r["Publish Time"], reverse=True)
+    return store, reviews
+
+
+def load_place_ids(path: str) -> dict:
+    """place ID -> state from an app5 output file (CSV/NDJSON, optionally gzipped)."""
+    places = {}
+    for row in writers.read_rows(path):
+        if row.get("Place ID"):
+            places.setdefault(row["Place ID"], row.get("State", ""))
+    return places
+
+
+def harvest(places: dict, output_file: str, max_workers=MAX_WORKERS, qps=PLACES_QPS,
+            max_age=DETAILS_MAX_AGE, force=False):
+    """Harvest reviews for {place ID: state} concurrently and stream them into one file."""
+    index = PlaceIndex()
+    if not force:
+        skipped = {p for p in places if not index.needs_details(p, max_age)}
+        places = {p: s for p, s in places.items() if p not in skipped}
+        if skipped:
+            print(f"⏭️ Skipping {len(skipped)} stores harvested in the last {max_age / 3600:.0f}h")
+
+    print(f"🔍 Harvesting reviews for {len(places)} stores...")
+    limiter = TokenBucket(qps)
+    total_reviews = 0
+    failed = 0
+
+    with writers.RowWriter(output_file, FIELDNAMES) as writer, \
+            ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {executor.submit(harvest_place, place_id, limiter): place_id for place_id in places}
+        for future in as_completed(futures):
+            place_id = futures[future]
+            try:
+                store, reviews = future.result()
+            except Exception as e:
+                print(f"  ⚠️ Error harvesting {place_id}: {e}")
+                failed += 1
+                continue
+
+            for review in reviews:
+                writer.write({"Place ID": place_id, "State": places[place_id], **store, **review})
+            writer.flush()
+            index.mark_details_fetched(place_id)
+            index.commit()
+            total_reviews += len(reviews)
+            print(f"  ✅ {store['Store Name']}: {len(reviews)} reviews")
+
+    index.close()
+    print(f"\n🎉 Harvested {total_reviews} reviews from {len(places) - failed} stores ({failed} failed)")
+    print(f"📁 Output file: {output_file}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Harvest all obtainable reviews for many Bunnings stores.")
+    parser.add_argument("place_ids", nargs="*", help="place IDs to harvest")
+    parser.add_argument("--stores", help="app5 output file to take place IDs (and states) from")
+    parser.add_argument("--from-index", action="store_true", help="harvest every store in the place index")
+    parser.add_argument("--output", help="output file (.csv/.ndjson, optionally .gz)")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="maximum concurrent stores")
+    parser.add_argument("--qps", type=float, default=PLACES_QPS, help="Places API queries per second (0 = unlimited)")
+    parser.add_argument("--force", action="store_true", help="re-harvest stores fetched recently")
+    args = parser.parse_args()
+
+    places = {place_id: "" for place_id in args.place_ids}
+    if args.stores:
+        places.update(load_place_ids(args.stores))
+    if args.from_index:
+        index = PlaceIndex()
+        for place_id, state in index.place_states().items():
+            places[place_id] = places.get(place_id) or state
+        index.close()
+
+    if not places:
+        parser.print_usage()
+        print("❌ No place IDs given; pass IDs, --stores or --from-index.")
+        sys.exit(1)
+    if not keypool.get_pool().keys:
+        print("❌ Google API key not found in .env file.")
+        sys.exit(1)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_file = args.output or os.path.join(OUTPUT_DIR, f"bunnings_reviews_{timestamp}.csv")
+    harvest(places, output_file, max_workers=args.workers, qps=args.qps, force=args.force)
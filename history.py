@@ -0,0 +1,259 @@
+# Append-only history of store snapshots with time-series queries over ratings.
+#
+# Every app3/app5 output file is ingested once into SQLite, keyed on place ID and
+# snapshot time, so trends and deltas never require re-reading old CSVs.
+import sys
+import argparse
+import glob
+import os
+import re
+import sqlite3
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+from checkpoint import Checkpoint
+import cube
+import schema
+import writers
+
+# --- CONFIGURATION ---
+load_dotenv()
+
+HISTORY_PATH = os.getenv("BUNNINGS_HISTORY_PATH", os.path.join("output", "history.sqlite"))
+SNAPSHOT_GLOB = os.path.join("output", "bunnings_stores_*")
+
+TIMESTAMP_PATTERN = re.compile(r"(\d{8}_\d{6})")
+
+
+def _number(value, cast=float):
+    try:
+        return cast(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def snapshot_time(path: str) -> str:
+    """ISO time of a snapshot, from the timestamp in its file name or else its mtime."""
+    match = TIMESTAMP_PATTERN.search(os.path.basename(path))
+    if match:
+        taken = datetime.strptime(match.group(1), "%Y%m%d_%H%M%S")
+    else:
+        taken = datetime.fromtimestamp(os.path.getmtime(path))
+    return taken.isoformat(timespec="seconds")
+
+
+def connect(path: str = HISTORY_PATH):
+    """Open the history database, creating tables and indexes on first use."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS snapshots (
+            snapshot_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            taken_at TEXT NOT NULL,
+            source TEXT UNIQUE,
+            ingested_at TEXT
+        );
+        CREATE TABLE IF NOT EXISTS store_ratings (
+            snapshot_id INTEGER NOT NULL REFERENCES snapshots (snapshot_id),
+            place_id TEXT NOT NULL,
+            state TEXT,
+            suburb TEXT,
+            name TEXT,
+            address TEXT,
+            rating REAL,
+            total_ratings INTEGER,
+            PRIMARY KEY (snapshot_id, place_id)
+        );
+        CREATE INDEX IF NOT EXISTS snapshots_taken ON snapshots (taken_at);
+        CREATE INDEX IF NOT EXISTS store_ratings_place ON store_ratings (place_id, snapshot_id);
+        """
+    )
+    cube.ensure_tables(conn)
+    return conn
+
+
+def ingest_rows(conn, rows, source: str, taken_at: str) -> int:
+    """Add one snapshot of store rows. Returns its snapshot_id (existing one if already ingested)."""
+    existing = conn.execute("SELECT snapshot_id FROM snapshots WHERE source = ?", (source,)).fetchone()
+    if existing:
+        return existing[0]
+
+    cursor = conn.execute(
+        "INSERT INTO snapshots (taken_at, source, ingested_at) VALUES (?, ?, ?)",
+        (taken_at, source, datetime.now().isoformat(timespec="seconds")),
+    )
+    snapshot_id = cursor.lastrowid
+
+    def records():
+        for row in rows:
+            name = row.get("Store Name", "")
+            address = row.get("Address", "")
+            # Old outputs have no place ID; fall back to a stable name + address key
+            place_id = row.get("Place ID") or f"{name}|{address}"
+            yield (
+                snapshot_id,
+                place_id,
+                # app3 output has no State column; take it from the address
+                row.get("State") or schema.state_from_address(address),
+                row.get("Suburb", ""),
+                name,
+                address,
+                _number(row.get("Store Rating", row.get("Rating"))),
+                _number(row.get("Total Ratings"), int),
+            )
+
+    conn.executemany("INSERT OR IGNORE INTO store_ratings VALUES (?, ?, ?, ?, ?, ?, ?, ?)", records())
+    conn.commit()
+    # Keep the aggregate cube in step: only the new snapshot is aggregated
+    cube.materialise(conn, snapshot_id)
+    return snapshot_id
+
+
+def ingest_file(conn, path: str) -> int:
+    """Ingest an app3/app5 output file (CSV/NDJSON, optionally gzipped)."""
+    return ingest_rows(conn, writers.read_rows(path), os.path.abspath(path), snapshot_time(path))
+
+
+def snapshot_kind(path: str) -> str:
+    """Run type from the name suffix after the timestamp: "" for sweeps, "discover" for grid runs."""
+    name = os.path.basename(path)
+    match = TIMESTAMP_PATTERN.search(name)
+    return name[match.end():].split(".")[0].lstrip("_") if match else ""
+
+
+def latest_snapshots(n: int = 1, pattern: str = SNAPSHOT_GLOB, kind: str = None) -> list:
+    """The n most recent finished output files, oldest first; kind=None matches any run type."""
+    paths = [p for p in finished_snapshots(pattern) if kind is None or snapshot_kind(p) == kind]
+    return sorted(paths, key=snapshot_time)[-n:]
+
+
+def finished_snapshots(pattern: str = SNAPSHOT_GLOB) -> list:
+    """Matching output files, skipping sweeps the checkpoint DB has not marked finished."""
+    checkpoint = Checkpoint()
+    unfinished = checkpoint.unfinished_outputs()
+    checkpoint.close()
+    return [p for p in sorted(glob.glob(pattern)) if os.path.abspath(p) not in unfinished]
+
+
+def ingest_new(conn, pattern: str = SNAPSHOT_GLOB) -> list:
+    """Ingest every finished output file not yet in the history. Returns the new snapshot IDs.
+
+    A sweep still in progress (or crashed) is left alone; app5 ingests it once it completes.
+    """
+    known = {r[0] for r in conn.execute("SELECT source FROM snapshots")}
+    new_ids = []
+    for path in finished_snapshots(pattern):
+        if os.path.abspath(path) not in known:
+            new_ids.append(ingest_file(conn, path))
+    return new_ids
+
+
+def snapshots(conn) -> list:
+    """All snapshots, oldest first."""
+    return [dict(r) for r in conn.execute(
+        "SELECT s.snapshot_id, s.taken_at, s.source, COUNT(r.place_id) AS stores FROM snapshots s"
+        " LEFT JOIN store_ratings r ON r.snapshot_id = s.snapshot_id"
+        " GROUP BY s.snapshot_id ORDER BY s.taken_at"
+    )]
+
+
+def rating_trend(conn, place_id: str) -> list:
+    """Rating and review count of one store across every snapshot it appears in."""
+    return [dict(r) for r in conn.execute(
+        "SELECT s.taken_at, r.rating, r.total_ratings FROM store_ratings r"
+        " JOIN snapshots s ON s.snapshot_id = r.snapshot_id"
+        " WHERE r.place_id = ? ORDER BY s.taken_at",
+        (place_id,),
+    )]
+
+
+def _latest_two(conn):
+    rows = conn.execute("SELECT snapshot_id FROM snapshots ORDER BY taken_at DESC LIMIT 2").fetchall()
+    if len(rows) < 2:
+        return None, None
+    return rows[1][0], rows[0][0]
+
+
+def deltas(conn, old_id: int = None, new_id: int = None) -> list:
+    """Per-store rating and review-count change between two snapshots (default: the latest two)."""
+    if old_id is None or new_id is None:
+        old_id, new_id = _latest_two(conn)
+        if old_id is None:
+            return []
+    return [dict(r) for r in conn.execute(
+        "SELECT n.place_id, n.state, n.name, o.rating AS old_rating, n.rating AS new_rating,"
+        " n.rating - o.rating AS rating_delta, o.total_ratings AS old_total, n.total_ratings AS new_total,"
+        " n.total_ratings - o.total_ratings AS total_delta"
+        " FROM store_ratings n JOIN store_ratings o ON o.place_id = n.place_id AND o.snapshot_id = ?"
+        " WHERE n.snapshot_id = ? ORDER BY n.state, n.name",
+        (old_id, new_id),
+    )]
+
+
+def top_movers(conn, n: int = 10, since: str = None, by: str = "rating") -> list:
+    """Stores whose rating (or review count, by="total") changed most between `since` and the latest snapshot."""
+    column = {"rating": "rating", "total": "total_ratings"}[by]
+    latest = conn.execute("SELECT snapshot_id FROM snapshots ORDER BY taken_at DESC LIMIT 1").fetchone()
+    if latest is None:
+        return []
+    baseline = conn.execute(
+        "SELECT snapshot_id FROM snapshots WHERE taken_at >= ? ORDER BY taken_at LIMIT 1",
+        (since or "",),
+    ).fetchone()
+    if baseline is None or baseline[0] == latest[0]:
+        return []
+    return [dict(r) for r in conn.execute(
+        f"SELECT n.place_id, n.state, n.name, o.{column} AS old_value, n.{column} AS new_value,"
+        f" n.{column} - o.{column} AS delta"
+        " FROM store_ratings n JOIN store_ratings o ON o.place_id = n.place_id AND o.snapshot_id = ?"
+        f" WHERE n.snapshot_id = ? AND n.{column} != o.{column}"
+        f" ORDER BY ABS(n.{column} - o.{column}) DESC LIMIT ?",
+        (baseline[0], latest[0], n),
+    )]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Historical store snapshots and rating trends.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ingest_parser = sub.add_parser("ingest", help="ingest output files (default: every new output/bunnings_stores_*)")
+    ingest_parser.add_argument("files", nargs="*")
+    sub.add_parser("snapshots", help="list ingested snapshots")
+    trend_parser = sub.add_parser("trend", help="rating trend for one store")
+    trend_parser.add_argument("place_id")
+    deltas_parser = sub.add_parser("deltas", help="changes between two snapshots (default: latest two)")
+    deltas_parser.add_argument("old_id", nargs="?", type=int)
+    deltas_parser.add_argument("new_id", nargs="?", type=int)
+    movers_parser = sub.add_parser("movers", help="stores with the biggest changes")
+    movers_parser.add_argument("-n", type=int, default=10)
+    movers_parser.add_argument("--since", help="ISO date of the baseline snapshot (default: oldest)")
+    movers_parser.add_argument("--by", choices=["rating", "total"], default="rating")
+    args = parser.parse_args()
+
+    conn = connect()
+    if args.command == "ingest":
+        ids = [ingest_file(conn, f) for f in args.files] if args.files else ingest_new(conn)
+        print(f"📥 Ingested {len(ids)} snapshots")
+    elif args.command == "snapshots":
+        for s in snapshots(conn):
+            print(f"  #{s['snapshot_id']}  {s['taken_at']}  {s['stores']} stores  {s['source']}")
+    elif args.command == "trend":
+        points = rating_trend(conn, args.place_id)
+        if not points:
+            print(f"❌ No history for {args.place_id}")
+            sys.exit(1)
+        for p in points:
+            print(f"  {p['taken_at']}  ⭐ {p['rating']}  ({p['total_ratings']} ratings)")
+    elif args.command == "deltas":
+        for d in deltas(conn, args.old_id, args.new_id):
+            if d["rating_delta"] or d["total_delta"]:
+                print(f"  {d['state']:<4} {d['name']}: ⭐ {d['old_rating']} → {d['new_rating']}, "
+                      f"ratings {d['old_total']} → {d['new_total']}")
+    elif args.command == "movers":
+        for m in top_movers(conn, args.n, args.since, args.by):
+            print(f"  {m['state']:<4} {m['name']}: {m['old_value']} → {m['new_value']} ({m['delta']:+g})")
+    conn.close()
@@ -0,0 +1,224 @@
+# Spread Places API (New) calls over a pool of API keys, each with its own QPS and daily quota.
+#
+# Keys come from GOOGLE_PLACES_NEW_API_KEYS as "key[:qps[:daily_quota]]" entries separated by
+# commas, falling back to the single GOOGLE_PLACES_NEW_API_KEY. Each key gets a token bucket;
+# daily usage is persisted in SQLite (keys are stored only as hashes) so separate runs on the
+# same day share the budget. A key answered with 429 cools down with backoff while the others
+# carry on; when every key's budget is spent, acquire() raises QuotaExhausted.
+import sys
+import atexit
+import hashlib
+import os
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+
+from ratelimit import TokenBucket
+
+# --- CONFIGURATION ---
+load_dotenv()
+
+KEYS_ENV = os.getenv("GOOGLE_PLACES_NEW_API_KEYS", "")
+SINGLE_KEY = os.getenv("GOOGLE_PLACES_NEW_API_KEY")
+KEY_QPS = float(os.getenv("BUNNINGS_KEY_QPS", "0"))  # default per-key QPS, 0 = only the job's --qps limit
+KEY_DAILY_QUOTA = int(os.getenv("BUNNINGS_KEY_DAILY_QUOTA", "0"))  # default per-key calls per day, 0 = unlimited
+USAGE_PATH = os.getenv("BUNNINGS_KEY_USAGE_PATH", os.path.join("output", "key_usage.sqlite"))
+
+BACKOFF_BASE = 1.0  # seconds a throttled key rests, doubled per consecutive 429
+BACKOFF_MAX = 60.0
+FLUSH_EVERY = 25  # usage increments between writes to SQLite
+
+
+class QuotaExhausted(Exception):
+    """Every key in the pool has used its daily quota."""
+
+
+def quota_day() -> str:
+    """Current quota day; Google resets daily quotas at midnight Pacific time."""
+    try:
+        from zoneinfo import ZoneInfo
+        now = datetime.now(ZoneInfo("America/Los_Angeles"))
+    except Exception:
+        now = datetime.now(timezone.utc)
+    return now.strftime("%Y-%m-%d")
+
+
+def key_id(key: str) -> str:
+    """Stable, non-secret identifier for a key."""
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:12]
+
+
+def parse_keys(spec: str, default_qps: float = KEY_QPS, default_quota: int = KEY_DAILY_QUOTA) -> list:
+    """[(key, qps, daily_quota)] from "key[:qps[:quota]],..." entries."""
+    keys = []
+    for entry in spec.split(","):
+        parts = [p.strip() for p in entry.strip().split(":")]
+        if not parts[0]:
+            continue
+        qps = float(parts[1]) if len(parts) > 1 and parts[1] else default_qps
+        quota = int(parts[2]) if len(parts) > 2 and parts[2] else default_quota
+        keys.append((parts[0], qps, quota))
+    return keys
+
+
+class KeyPool:
+    """Thread-safe scheduler that hands out the key with the most budget left that can go now."""
+
+    def __init__(self, keys: list, path: str = USAGE_PATH):
+        self.keys = [k for k, _, _ in keys]
+        self.qps = {k: q for k, q, _ in keys}
+        self.quota = {k: quota for k, _, quota in keys}
+        self.buckets = {k: TokenBucket(q) for k, q, _ in keys}
+        self.cooldown = {k: 0.0 for k in self.keys}
+        self.failures = {k: 0 for k in self.keys}
+        self.lock = threading.Lock()
+        self.path = path
+        self.conn = None
+        self.day = quota_day()
+        self.used = {k: 0 for k in self.keys}
+        self.pending = 0
+        if self.keys:
+            self._load()
+
+    def _connect(self):
+        if self.conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS usage ("
+                " key_id TEXT, day TEXT, used INTEGER, PRIMARY KEY (key_id, day))"
+            )
+        return self.conn
+
+    def _load(self):
+        conn = self._connect()
+        for key in self.keys:
+            row = conn.execute("SELECT used FROM usage WHERE key_id = ? AND day = ?", (key_id(key), self.day)).fetchone()
+            self.used[key] = row[0] if row else 0
+
+    def _roll_day(self):
+        day = quota_day()
+        if day != self.day:
+            self._flush_locked()  # called with the lock held
+            self.day = day
+            self.used = {k: 0 for k in self.keys}
+
+    def remaining(self, key: str):
+        """Calls left today for a key (None if unlimited)."""
+        quota = self.quota[key]
+        return max(0, quota - self.used[key]) if quota > 0 else None
+
+    def acquire(self) -> str:
+        """Block until some key may send a request now, and return it.
+
+        Usage is counted when responses arrive, so concurrent workers can overshoot a quota by
+        at most the number of requests in flight.
+        """
+        if not self.keys:
+            raise QuotaExhausted("No API keys configured")
+        while True:
+            with self.lock:
+                self._roll_day()
+                now = time.monotonic()
+                usable = [k for k in self.keys if self.remaining(k) != 0]
+                if not usable:
+                    raise QuotaExhausted(f"All {len(self.keys)} API keys have used their daily quota")
+                # Most remaining budget first; unlimited keys rank by how little they have been used
+                usable.sort(key=lambda k: (-(self.remaining(k) if self.remaining(k) is not None else float("inf")),
+                                           self.used[k]))
+                for key in usable:
+                    if self.cooldown[key] <= now and self.buckets[key].try_acquire():
+                        return key
+                wait = min([max(0.0, self.cooldown[k] - now) for k in usable] + [0.05])
+            time.sleep(max(wait, 0.005))
+
+    def record(self, key: str, status: int, retry_after: str = None):
+        """Account for one response sent with `key`: count billable calls, cool down on 429."""
+        if key not in self.used:
+            return
+        with self.lock:
+            if status == 429:
+                self.failures[key] += 1
+                delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (self.failures[key] - 1))
+                try:
+                    delay = max(delay, float(retry_after)) if retry_after else delay
+                except ValueError:
+                    pass
+                self.cooldown[key] = time.monotonic() + random.uniform(delay / 2, delay)
+                return
+            self.failures[key] = 0
+            if 200 <= status < 300:
+                self.used[key] += 1
+                self.pending += 1
+                if self.pending >= FLUSH_EVERY:
+                    self._flush_locked()
+
+    def _flush_locked(self):
+        if not self.pending:
+            return
+        conn = self._connect()
+        conn.executemany(
+            "INSERT INTO usage (key_id, day, used) VALUES (?, ?, ?)"
+            " ON CONFLICT (key_id, day) DO UPDATE SET used = excluded.used",
+            [(key_id(k), self.day, self.used[k]) for k in self.keys],
+        )
+        conn.commit()
+        self.pending = 0
+
+    def flush(self):
+        """Persist today's usage counts."""
+        with self.lock:
+            self._flush_locked()
+
+    def hook(self, method, url, response, elapsed):
+        """client.RESPONSE_HOOKS callback: attribute each response to the key that sent it."""
+        if response is None or response.request is None:
+            return
+        key = response.request.headers.get("X-Goog-Api-Key")
+        if key:
+            self.record(key, response.status_code, response.headers.get("Retry-After"))
+
+    def status(self) -> list:
+        """(key id, qps, quota, used today, remaining, cooling down) per key."""
+        now = time.monotonic()
+        return [(key_id(k), self.qps[k], self.quota[k], self.used[k], self.remaining(k), self.cooldown[k] > now)
+                for k in self.keys]
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> KeyPool:
+    """Return the process-wide key pool, creating it from the environment on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                import client
+
+                keys = parse_keys(KEYS_ENV) or parse_keys(SINGLE_KEY or "")
+                pool = KeyPool(keys)
+                client.RESPONSE_HOOKS.append(pool.hook)
+                client.KEY_PROVIDER = pool.acquire  # retries move to another key
+                atexit.register(pool.flush)
+                _pool = pool
+    return _pool
+
+
+if __name__ == "__main__":
+    pool = get_pool()
+    if not pool.keys:
+        print("❌ No keys found; set GOOGLE_PLACES_NEW_API_KEYS or GOOGLE_PLACES_NEW_API_KEY in .env")
+        sys.exit(1)
+    print(f"🔑 {len(pool.keys)} keys, quota day {pool.day}")
+    for kid, qps, quota, used, remaining, cooling in pool.status():
+        budget = f"{used}/{quota}" if quota else f"{used}/unlimited"
+        rate = f"{qps:g} qps" if qps > 0 else "no qps cap"
+        print(f"  {kid}  {rate}  {budget}{'  (cooling down)' if cooling else ''}")
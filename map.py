@@ -1,22 +1,10 @@
-import pandas as pd
-import plotly.express as px
 import json
-from rich import print
 
-# --- Load data ---
-df = pd.read_csv("output/bunnings_stores_20251022_000234.csv")
+import ratings
+import schema
 
-# Clean
-df["State"] = df["State"].str.upper().str.strip()
-df["Store Rating"] = pd.to_numeric(df["Store Rating"], errors="coerce")
-df["Total Ratings"] = pd.to_numeric(df["Total Ratings"], errors="coerce")
-
-# Aggregate per state
-state_stats = (
-    df.groupby("State")
-    .agg(Average_Rating=("Store Rating", "mean"), Store_Count=("Store Name", "count"), Total_Ratings=("Total Ratings", "sum"))
-    .reset_index()
-)
+STORES_FILE = "output/bunnings_stores_20251022_000234.csv"
+STATES_GEOJSON = "data/australian-states.json"
 
 # Map codes to full names matching the GeoJSON
 state_name_map = {
@@ -29,33 +17,85 @@ state_name_map = {
     "ACT": "Australian Capital Territory",
     "NT": "Northern Territory"
 }
-state_stats["State_Name"] = state_stats["State"].map(state_name_map)
-
-print(state_stats)
-
-# --- Load Australia GeoJSON ---
-with open("data/australian-states.json") as f:
-    geojson = json.load(f)
-
-# --- Create Choropleth ---
-fig = px.choropleth(
-    state_stats,
-    geojson=geojson,
-    locations="State_Name",
-    featureidkey="properties.STATE_NAME",  # must match field in geojson
-    color="Average_Rating",  # or 'Store_Count'
-    color_continuous_scale="Viridis",
-    title="Average Bunnings Store Rating by State (Australia)",
-    labels={"Average_Rating": "Avg Store Rating", "State_Name": "State", "Store_Count": "Number of Stores", "Total_Ratings": "Total Number of Ratings"},
-    hover_name="State_Name",  # shows on hover
-    hover_data={
-        "Store_Count": True,
-        "Average_Rating": ":.2f",  # format to 2 decimals
-        "State_Name": False,       # avoid duplicate name
-        "State": True,
-        "Total_Ratings": True
-    }
-)
-
-fig.update_geos(fitbounds="locations", visible=False)
-fig.show()
+
+METRIC_TITLES = {
+    "Average_Rating": "Average Bunnings Store Rating by State (Australia)",
+    "Store_Count": "Number of Bunnings Stores by State (Australia)",
+    "Total_Ratings": "Total Bunnings Store Ratings by State (Australia)",
+}
+
+
+def load_state_stats(path=STORES_FILE, weighted=False):
+    """Aggregate a store snapshot per state."""
+    # --- Load data ---
+    # A sweep CSV/NDJSON file or a Parquet dataset (e.g. output/parquet/stores); only these columns are read
+    df = schema.load_stores(
+        path,
+        columns=["Place ID", "State", "Store Name", "Address", "Store Rating", "Total Ratings"],
+    )
+
+    # Older sweeps wrote one row per matching suburb; count each store once
+    df = df.drop_duplicates(subset=["Place ID"] if "Place ID" in df.columns else ["Store Name", "Address"])
+
+    # Clean
+    df["State"] = df["State"].str.upper().str.strip()
+
+    # Aggregate per state (optionally weighting each store's rating by its number of ratings)
+    state_stats = ratings.aggregate(df, "State", weighted=weighted)
+    state_stats["State_Name"] = state_stats["State"].map(state_name_map)
+    return state_stats
+
+
+def load_state_stats_from_history(weighted=False):
+    """Per-state stats of the latest ingested snapshot, read from the precomputed cube."""
+    import cube
+    import history
+
+    conn = history.connect()
+    state_stats = cube.stats(conn, "state", weighted=weighted)
+    conn.close()
+    state_stats["State_Name"] = state_stats["State"].map(state_name_map)
+    return state_stats
+
+
+def load_states_geojson(path=STATES_GEOJSON):
+    # --- Load Australia GeoJSON ---
+    with open(path) as f:
+        return json.load(f)
+
+
+def build_state_figure(state_stats, geojson, metric="Average_Rating"):
+    """State-level choropleth coloured by one of Average_Rating, Store_Count or Total_Ratings."""
+    import plotly.express as px
+
+    # --- Create Choropleth ---
+    fig = px.choropleth(
+        state_stats,
+        geojson=geojson,
+        locations="State_Name",
+        featureidkey="properties.STATE_NAME",  # must match field in geojson
+        color=metric,
+        color_continuous_scale="Viridis",
+        title=METRIC_TITLES[metric],
+        labels={"Average_Rating": "Avg Store Rating", "State_Name": "State", "Store_Count": "Number of Stores", "Total_Ratings": "Total Number of Ratings"},
+        hover_name="State_Name",  # shows on hover
+        hover_data={
+            "Store_Count": True,
+            "Average_Rating": ":.2f",  # format to 2 decimals
+            "State_Name": False,       # avoid duplicate name
+            "State": True,
+            "Total_Ratings": True
+        }
+    )
+
+    fig.update_geos(fitbounds="locations", visible=False)
+    return fig
+
+
+if __name__ == "__main__":
+    from rich import print
+
+    state_stats = load_state_stats()
+    print(state_stats)
+    fig = build_state_figure(state_stats, load_states_geojson())
+    fig.show()
@@ -1,87 +1,128 @@
-import pandas as pd
-import geopandas as gpd
-import plotly.express as px
-from rich import print
-
-state_code="SA"  # e.g., "NSW", "VIC", "QLD", etc.
-
-# Load your store data
-df = pd.read_csv("output/bunnings_stores_20251022_000234.csv")
-
-# Clean suburb names (trim, uppercase/lowercase consistency)
-df["Suburb"] = df["Suburb"].str.strip().str.upper()
-
-# Aggregate by suburb (within state):
-suburb_stats = (
-    df.groupby(["State","Suburb"])
-      .agg(Average_Rating=("Store Rating", "mean"),
-           Store_Count=("Store Name","count"),
-           Total_Ratings=("Total Ratings","sum"))
-      .reset_index()
-)
-
-gdf = gpd.read_file("data/suburb-2-sa.geojson")
-
-# Clean the name field in gdf so you can match:
-gdf["SUBURB_NAME"] = gdf["sa_local_2"].str.strip().str.upper()  # replace as per your data
-
-# Merge (left join) your stats into the geodata:
-gdf2 = gdf.merge(suburb_stats[suburb_stats["State"]==state_code],
-                 left_on="SUBURB_NAME", right_on="Suburb",
-                 how="left")
-
-# --- MODIFICATIONS FOR GREY 'NO STORE' SUBURBS ---
-
-# 1. Create a categorical column for coloring.
-# Suburbs with stores will have their rating converted to a string (rounded to one decimal).
-# Suburbs without stores (NaN rating) will be marked with the string 'No Stores'.
-gdf2['Rating_Category'] = gdf2['Average_Rating'].apply(
-    lambda x: f'{x:.1f}' if pd.notna(x) else 'No Stores'
-)
-
-# 2. Define the discrete color map, mapping 'No Stores' to 'white'.
-color_map = {'No Stores': 'white'}
-
-# 3. Get unique *actual* ratings to define a color sequence.
-rating_values = sorted(
-    [r for r in gdf2['Rating_Category'].unique() if r != 'No Stores'],
-    key=float
-)
-
-# Use a continuous color scale (Viridis) to generate discrete colors for the ratings.
-if rating_values:
-    colors = px.colors.sample_colorscale("Viridis", [n/(len(rating_values)-1) for n in range(len(rating_values))] if len(rating_values) > 1 else [0])
-    
-    # Update the color map with the generated colors for the specific rating strings
-    for rating, color in zip(rating_values, colors):
-        color_map[rating] = color
-
-# 4. Create the choropleth map using the categorical column and discrete map.
-fig = px.choropleth(
-    gdf2,
-    geojson=gdf2.geometry,
-    locations=gdf2.index,
-    color="Rating_Category", # Use the new categorical column
-    hover_name="SUBURB_NAME",
-    custom_data=[],
-    hover_data={
+import sys
+
+import gazetteer
+import geometry
+import ratings
+import schema
+import spatial
+
+STORES_FILE = "output/bunnings_stores_20251022_000234.csv"
+
+METRIC_LABELS = {
+    "Average_Rating": "Average Store Rating",
+    "Store_Count": "Number of Stores",
+    "Total_Ratings": "Total Ratings",
+}
+
+
+def load_stores(path=STORES_FILE):
+    """Load a store snapshot, one row per store, with normalised suburb names."""
+    # Load your store data (CSV/NDJSON sweep output or a Parquet dataset), typed and column-pruned
+    df = schema.load_stores(
+        path,
+        columns=["Place ID", "State", "Suburb", "Store Name", "Address", "Store Rating", "Total Ratings",
+                 "Latitude", "Longitude"],
+    )
+
+    # Older sweeps wrote one row per matching suburb; count each store once
+    df = df.drop_duplicates(subset=["Place ID"] if "Place ID" in df.columns else ["Store Name", "Address"])
+
+    # Resolve each spelling to the canonical name the cached geometry is keyed by
+    gaz = gazetteer.load()
+    df["Suburb"] = [gaz.canonical(state, suburb) for state, suburb in zip(df["State"], df["Suburb"])]
+    return df
+
+
+def suburb_geodata(df, state_code, weighted=False):
+    """Suburb polygons for a state (or "ALL") joined with per-suburb store statistics.
+
+    weighted=True weights each suburb's average rating by the stores' Total Ratings.
+    """
+    # Simplified polygons from data/cache (built from data/suburb-2-<state>.geojson on first use),
+    # already keyed by a normalised SUBURB_NAME and STATE
+    gdf = geometry.load_suburbs(state_code)
+
+    # Place stores with coordinates in the suburb polygon that contains them; others keep
+    # the suburb they were searched under
+    df = spatial.assign_suburbs(df, gdf)
+
+    # Aggregate by suburb (within state):
+    suburb_stats = ratings.aggregate(df, ["State", "Suburb"], weighted=weighted)
+
+    # Merge (left join) your stats into the geodata:
+    return gdf.merge(suburb_stats,
+                     left_on=["STATE", "SUBURB_NAME"], right_on=["State", "Suburb"],
+                     how="left")
+
+
+def build_suburb_figure(gdf2, state_code, metric="Average_Rating"):
+    """Suburb choropleth; ratings get a discrete legend with 'No Stores' suburbs in white."""
+    import plotly.express as px
+
+    hover_data = {
         "Store_Count": True,
         "Average_Rating": ":.1f",
         "Total_Ratings": True,
-    },
-    labels={"SUBURB_NAME": "Suburb", "Average_Rating": "Avg Store Rating", "Store_Count": "Number of Stores"},
-    title=f"Bunnings Stores in {state_code} – Suburb Average Rating Map",
-    color_discrete_map=color_map, # Map 'No Stores' to 'white' and ratings to gradient
-    category_orders={"Rating_Category": rating_values + ['No Stores']} # Ensure correct order in legend
-)
-
-fig.update_geos(fitbounds="locations", visible=False)
-fig.update_selections(marker_line_width=0.5, marker_line_color='grey')
-fig.update_layout(legend_title_text='Average Store Rating')
-fig.update_traces(
-    hovertemplate="<b>%{hovertext}</b><br><br>" +
-                  "Stores: %{customdata[0]}<br>" + 
-                  "Average Rating: %{customdata[1]}</br>" +
-                  "Total Ratings: %{customdata[2]}<extra></extra>"
-)
-fig.show()
+    }
+    labels = {"SUBURB_NAME": "Suburb", "Average_Rating": "Avg Store Rating", "Store_Count": "Number of Stores"}
+    title = f"Bunnings Stores in {state_code} – Suburb {METRIC_LABELS[metric]} Map"
+
+    if metric != "Average_Rating":
+        # Counts are continuous; suburbs without stores are left uncoloured
+        fig = px.choropleth(
+            gdf2,
+            geojson=gdf2.geometry,
+            locations=gdf2.index,
+            color=metric,
+            color_continuous_scale="Viridis",
+            hover_name="SUBURB_NAME",
+            hover_data=hover_data,
+            labels=labels,
+            title=title,
+        )
+    else:
+        # --- MODIFICATIONS FOR GREY 'NO STORE' SUBURBS ---
+
+        # 1. Create a categorical column for coloring.
+        # Suburbs with stores will have their rating converted to a string (rounded to one decimal).
+        # Suburbs without stores (NaN rating) will be marked with the string 'No Stores'.
+        gdf2['Rating_Category'] = ratings.rating_categories(gdf2['Average_Rating'])
+
+        # 2. Ordered rating labels present in the data, followed by 'No Stores'.
+        rating_values = [c for c in gdf2['Rating_Category'].cat.categories if c != ratings.NO_STORES]
+
+        # 3. Sample Viridis once per rating label and map 'No Stores' to 'white'.
+        color_map = ratings.colour_map(gdf2['Rating_Category'].cat.categories)
+
+        # 4. Create the choropleth map using the categorical column and discrete map.
+        fig = px.choropleth(
+            gdf2,
+            geojson=gdf2.geometry,
+            locations=gdf2.index,
+            color="Rating_Category", # Use the new categorical column
+            hover_name="SUBURB_NAME",
+            custom_data=[],
+            hover_data=hover_data,
+            labels=labels,
+            title=title,
+            color_discrete_map=color_map, # Map 'No Stores' to 'white' and ratings to gradient
+            category_orders={"Rating_Category": rating_values + ['No Stores']} # Ensure correct order in legend
+        )
+        fig.update_layout(legend_title_text='Average Store Rating')
+
+    fig.update_geos(fitbounds="locations", visible=False)
+    fig.update_selections(marker_line_width=0.5, marker_line_color='grey')
+    fig.update_traces(
+        hovertemplate="<b>%{hovertext}</b><br><br>" +
+                      "Stores: %{customdata[0]}<br>" +
+                      "Average Rating: %{customdata[1]}</br>" +
+                      "Total Ratings: %{customdata[2]}<extra></extra>"
+    )
+    return fig
+
+
+if __name__ == "__main__":
+    state_code = sys.argv[1].upper() if len(sys.argv) > 1 else "SA"  # e.g., "NSW", "VIC", "QLD" or "ALL"
+    gdf2 = suburb_geodata(load_stores(), state_code)
+    fig = build_suburb_figure(gdf2, state_code)
+    fig.show()
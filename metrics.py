@@ -0,0 +1,197 @@
+# Per-request instrumentation for Places API calls: latency histograms, statuses, retries, bytes, cache hits.
+#
+# client.py reports every attempt here. Series are keyed by endpoint and an optional scope
+# (e.g. the state being swept) so slow states show up separately. Set BUNNINGS_METRICS_FILE
+# to write the totals at exit: Prometheus text for a .prom/.txt path, JSON otherwise.
+import sys
+import atexit
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import urlparse
+
+from dotenv import load_dotenv
+
+# --- CONFIGURATION ---
+load_dotenv()
+
+METRICS_FILE = os.getenv("BUNNINGS_METRICS_FILE")
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implied
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_series = {}
+_local = threading.local()
+
+
+def endpoint(url: str) -> str:
+    """Stable endpoint label for a URL, with place IDs in the new API's path collapsed."""
+    path = urlparse(url).path
+    if path.startswith("/v1/places/"):
+        return "/v1/places/{id}"
+    return path or url
+
+
+def current_scope() -> str:
+    return getattr(_local, "scope", "")
+
+
+@contextmanager
+def scope(name: str):
+    """Attribute requests made by this thread inside the block to `name` (e.g. a state code)."""
+    previous = current_scope()
+    _local.scope = name
+    try:
+        yield
+    finally:
+        _local.scope = previous
+
+
+def _get(url: str) -> dict:
+    key = (endpoint(url), current_scope())
+    series = _series.get(key)
+    if series is None:
+        series = _series[key] = {
+            "endpoint": key[0], "scope": key[1],
+            "count": 0, "sum": 0.0, "buckets": [0] * (len(BUCKETS) + 1),
+            "statuses": {}, "retries": 0, "bytes_sent": 0, "bytes_received": 0,
+            "cache_hits": 0, "cache_misses": 0,
+        }
+    return series
+
+
+def record_attempt(url: str, response, elapsed: float):
+    """One HTTP attempt; response is None when it failed to connect or timed out."""
+    status = str(response.status_code) if response is not None else "error"
+    sent = received = 0
+    if response is not None:
+        received = len(response.content)
+        body = response.request.body if response.request is not None else None
+        sent = len(body) if body else 0
+    bucket = next((i for i, bound in enumerate(BUCKETS) if elapsed <= bound), len(BUCKETS))
+    with _lock:
+        series = _get(url)
+        series["count"] += 1
+        series["sum"] += elapsed
+        series["buckets"][bucket] += 1
+        series["statuses"][status] = series["statuses"].get(status, 0) + 1
+        series["bytes_sent"] += sent
+        series["bytes_received"] += received
+
+
+def record_retry(url: str):
+    with _lock:
+        _get(url)["retries"] += 1
+
+
+def record_cache(url: str, hit: bool):
+    with _lock:
+        _get(url)["cache_hits" if hit else "cache_misses"] += 1
+
+
+def snapshot() -> list:
+    """A copy of every series, sorted by endpoint and scope."""
+    with _lock:
+        return [json.loads(json.dumps(s)) for _, s in sorted(_series.items())]
+
+
+def reset():
+    with _lock:
+        _series.clear()
+
+
+def to_json(series: list) -> str:
+    bounds = [str(b) for b in BUCKETS] + ["+Inf"]
+    out = []
+    for s in series:
+        s = dict(s, buckets=dict(zip(bounds, s["buckets"])))
+        s["mean_seconds"] = round(s["sum"] / s["count"], 4) if s["count"] else None
+        out.append(s)
+    return json.dumps({"generated_at": datetime.now().isoformat(timespec="seconds"), "series": out}, indent=2)
+
+
+def _labels(s: dict, **extra) -> str:
+    labels = {"endpoint": s["endpoint"], "scope": s["scope"], **extra}
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+
+def to_prometheus(series: list) -> str:
+    lines = [
+        "# HELP places_request_duration_seconds Latency of each Places API request attempt.",
+        "# TYPE places_request_duration_seconds histogram",
+    ]
+    for s in series:
+        cumulative = 0
+        for bound, n in zip([str(b) for b in BUCKETS] + ["+Inf"], s["buckets"]):
+            cumulative += n
+            lines.append(f"places_request_duration_seconds_bucket{_labels(s, le=bound)} {cumulative}")
+        lines.append(f"places_request_duration_seconds_sum{_labels(s)} {s['sum']:.6f}")
+        lines.append(f"places_request_duration_seconds_count{_labels(s)} {s['count']}")
+
+    counters = [
+        ("places_responses_total", "Responses by HTTP status (error = no response).", None),
+        ("places_retries_total", "Attempts retried after a transient failure.", "retries"),
+        ("places_request_bytes_total", "Request body bytes sent.", "bytes_sent"),
+        ("places_response_bytes_total", "Response body bytes received.", "bytes_received"),
+        ("places_cache_lookups_total", "Response cache lookups by result.", None),
+    ]
+    for name, help_text, field in counters:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for s in series:
+            if name == "places_responses_total":
+                lines += [f"{name}{_labels(s, status=k)} {v}" for k, v in sorted(s["statuses"].items())]
+            elif name == "places_cache_lookups_total":
+                lines.append(f"{name}{_labels(s, result='hit')} {s['cache_hits']}")
+                lines.append(f"{name}{_labels(s, result='miss')} {s['cache_misses']}")
+            else:
+                lines.append(f"{name}{_labels(s)} {s[field]}")
+    return "\n".join(lines) + "\n"
+
+
+def export(path: str = None) -> str:
+    """Write the current metrics to `path` (default BUNNINGS_METRICS_FILE); returns the path or None."""
+    path = path or METRICS_FILE
+    series = snapshot()
+    if not path or not series:
+        return None
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    prometheus = path.endswith((".prom", ".txt"))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(to_prometheus(series) if prometheus else to_json(series))
+    print(f"📈 Request metrics written to {path}")
+    return path
+
+
+def summary(series: list) -> str:
+    """Plain-text table of requests, errors, retries, mean latency and cache hit rate per series."""
+    rows = [f"{'endpoint':<36} {'scope':<8} {'reqs':>6} {'errors':>6} {'retries':>7} {'mean ms':>8} {'KiB in':>8} {'cache hit':>9}"]
+    for s in sorted(series, key=lambda s: -(s["sum"] / s["count"]) if s["count"] else 0):
+        errors = sum(n for status, n in s["statuses"].items() if not status.startswith("2"))
+        lookups = s["cache_hits"] + s["cache_misses"]
+        mean = s["sum"] / s["count"] * 1000 if s["count"] else 0
+        hit_rate = f"{s['cache_hits'] / lookups:.0%}" if lookups else "-"
+        rows.append(f"{s['endpoint']:<36} {s['scope'] or '-':<8} {s['count']:>6} {errors:>6} {s['retries']:>7} "
+                    f"{mean:>8.1f} {s['bytes_received'] / 1024:>8.1f} {hit_rate:>9}")
+    return "\n".join(rows)
+
+
+if METRICS_FILE:
+    atexit.register(export)
+
+
+if __name__ == "__main__":
+    # Summarise a JSON export, slowest series first
+    path = sys.argv[1] if len(sys.argv) > 1 else METRICS_FILE
+    if not path or not os.path.exists(path):
+        print("❌ Usage: python metrics.py <metrics.json>")
+        sys.exit(1)
+    with open(path, encoding="utf-8") as f:
+        series = json.load(f)["series"]
+    for s in series:
+        s["buckets"] = list(s["buckets"].values())
+    print(summary(series))
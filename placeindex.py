@@ -0,0 +1,138 @@
+# Persistent index of which Bunnings store (place ID) each searched suburb resolved to.
+import os
+import sqlite3
+import time
+
+from dotenv import load_dotenv
+
+# --- CONFIGURATION ---
+load_dotenv()
+
+INDEX_PATH = os.getenv("BUNNINGS_INDEX_PATH", os.path.join("output", "place_index.sqlite"))
+# Seconds a suburb's top search result is trusted before the suburb is searched again (30 days)
+RESOLUTION_MAX_AGE = float(os.getenv("BUNNINGS_RESOLUTION_MAX_AGE", str(30 * 24 * 3600)))
+
+
+class PlaceIndex:
+    """Suburb -> place ID resolutions plus the set of place IDs seen across all runs."""
+
+    def __init__(self, path: str = INDEX_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS places (
+                place_id TEXT PRIMARY KEY,
+                name TEXT,
+                address TEXT,
+                first_seen REAL,
+                last_seen REAL,
+                details_fetched_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS suburbs (
+                state TEXT,
+                suburb TEXT,
+                place_id TEXT,
+                resolved_at REAL,
+                PRIMARY KEY (state, suburb, place_id)
+            );
+            CREATE TABLE IF NOT EXISTS resolutions (
+                state TEXT,
+                suburb TEXT,
+                place_id TEXT,      -- top (most relevant) search result
+                resolved_at REAL,
+                PRIMARY KEY (state, suburb)
+            );
+            """
+        )
+
+    def record_place(self, place_id: str, name: str = None, address: str = None):
+        """Mark a place as seen now, remembering its latest name and address."""
+        now = time.time()
+        self.conn.execute(
+            "INSERT INTO places (place_id, name, address, first_seen, last_seen) VALUES (?, ?, ?, ?, ?)"
+            " ON CONFLICT(place_id) DO UPDATE SET"
+            " name = COALESCE(excluded.name, name), address = COALESCE(excluded.address, address),"
+            " last_seen = excluded.last_seen",
+            (place_id, name, address, now, now),
+        )
+
+    def record_suburb(self, state: str, suburb: str, place_ids):
+        """Remember which place IDs a suburb search resolved to, in result order."""
+        now = time.time()
+        place_ids = list(place_ids)
+        self.conn.execute("DELETE FROM suburbs WHERE state = ? AND suburb = ?", (state, suburb))
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO suburbs VALUES (?, ?, ?, ?)",
+            [(state, suburb, place_id, now) for place_id in place_ids],
+        )
+        if place_ids:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO resolutions VALUES (?, ?, ?, ?)",
+                (state, suburb.strip().upper(), place_ids[0], now),
+            )
+
+    def places_for_suburb(self, state: str, suburb: str) -> list:
+        """Place IDs previously resolved for a suburb (empty if never searched)."""
+        rows = self.conn.execute(
+            "SELECT place_id FROM suburbs WHERE state = ? AND suburb = ? ORDER BY resolved_at",
+            (state, suburb),
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    def find_suburb(self, suburb: str, state: str = None, max_age: float = RESOLUTION_MAX_AGE) -> list:
+        """[(state, place_id)] of a suburb's top search result per state, newest first.
+
+        Matches the name case-insensitively, in `state` only if given, and ignores
+        resolutions older than max_age seconds.
+        """
+        sql = "SELECT state, place_id FROM resolutions WHERE suburb = ? AND resolved_at >= ?"
+        params = [suburb.strip().upper(), time.time() - max_age]
+        if state:
+            sql += " AND state = ?"
+            params.append(state.upper())
+        return [tuple(r) for r in self.conn.execute(sql + " ORDER BY resolved_at DESC", params)]
+
+    def address(self, place_id: str) -> str:
+        """Last recorded formatted address of a place ("" if unknown)."""
+        row = self.conn.execute("SELECT address FROM places WHERE place_id = ?", (place_id,)).fetchone()
+        return (row[0] or "") if row else ""
+
+    def is_known(self, place_id: str) -> bool:
+        """True if the place has been seen in this or any earlier run."""
+        row = self.conn.execute("SELECT 1 FROM places WHERE place_id = ?", (place_id,)).fetchone()
+        return row is not None
+
+    def needs_details(self, place_id: str, max_age: float) -> bool:
+        """True unless details for the place were fetched within the last max_age seconds."""
+        row = self.conn.execute(
+            "SELECT details_fetched_at FROM places WHERE place_id = ?", (place_id,)
+        ).fetchone()
+        return row is None or row[0] is None or row[0] < time.time() - max_age
+
+    def mark_details_fetched(self, place_id: str):
+        """Record that details/reviews for the place were just fetched."""
+        self.record_place(place_id)
+        self.conn.execute("UPDATE places SET details_fetched_at = ? WHERE place_id = ?", (time.time(), place_id))
+
+    def place_states(self) -> dict:
+        """place ID -> state of a suburb that resolved to it ("" if unknown)."""
+        rows = self.conn.execute(
+            "SELECT p.place_id, COALESCE(MIN(NULLIF(s.state, '')), '') FROM places p"
+            " LEFT JOIN suburbs s ON s.place_id = p.place_id GROUP BY p.place_id ORDER BY p.place_id"
+        ).fetchall()
+        return dict(rows)
+
+    def place_ids(self) -> list:
+        """Every place ID in the index."""
+        return [r[0] for r in self.conn.execute("SELECT place_id FROM places ORDER BY place_id")]
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
@@ -0,0 +1,150 @@
+# Derive minimal Places API (New) field masks from the output columns a job actually writes.
+#
+# Every field in X-Goog-FieldMask adds bytes to the response and can move the call into a
+# more expensive SKU tier, so jobs ask for exactly the fields behind their columns. Text
+# Search can return any Place field (reviews included), so a search followed by a details
+# call for the same place can be one search call instead.
+import sys
+import argparse
+
+# Output column -> Place field it is built from (columns not listed are derived locally)
+COLUMN_FIELDS = {
+    "Place ID": "id",
+    "Store Name": "displayName",
+    "Address": "formattedAddress",
+    "State": "formattedAddress",
+    "Latitude": "location",
+    "Longitude": "location",
+    "Store Rating": "rating",
+    "Total Ratings": "userRatingCount",
+    "Author": "reviews",
+    "Rating": "reviews",
+    "Date": "reviews",
+    "Publish Time": "reviews",
+    "Language": "reviews",
+    "Text": "reviews",
+}
+
+# Places API (New) SKU tiers, cheapest first, and the tier each field triggers
+SKU_TIERS = ["Essentials (IDs Only)", "Essentials", "Pro", "Enterprise", "Enterprise + Atmosphere"]
+FIELD_TIERS = {
+    "id": 0,
+    "formattedAddress": 1,
+    "location": 1,
+    "displayName": 2,
+    "rating": 3,
+    "userRatingCount": 3,
+    "reviews": 4,
+}
+
+# Fields Text Search returns directly; anything else would need a details call
+SEARCH_FIELDS = set(FIELD_TIERS)
+
+
+def fields_for(columns) -> list:
+    """Place fields needed to fill `columns`, in a stable order without duplicates."""
+    fields = []
+    for column in columns:
+        field = COLUMN_FIELDS.get(column)
+        if field and field not in fields:
+            fields.append(field)
+    return sorted(fields, key=lambda f: (FIELD_TIERS.get(f, len(SKU_TIERS)), f))
+
+
+def search_mask(columns, paginate: bool = False) -> str:
+    """X-Goog-FieldMask for a searchText call that fills `columns`."""
+    mask = [f"places.{f}" for f in fields_for(columns)]
+    if paginate:
+        mask.append("nextPageToken")
+    return ",".join(mask)
+
+
+def details_mask(columns) -> str:
+    """X-Goog-FieldMask for a place-details call that fills `columns`."""
+    return ",".join(fields_for(columns))
+
+
+def sku_tier(columns) -> str:
+    """The SKU tier a call requesting the fields behind `columns` is billed at."""
+    tiers = [FIELD_TIERS.get(f, len(SKU_TIERS) - 1) for f in fields_for(columns)]
+    return SKU_TIERS[max(tiers, default=0)]
+
+
+def search_suffices(columns) -> bool:
+    """True when a search response alone can fill `columns`, so no details call is needed."""
+    return all(f in SEARCH_FIELDS for f in fields_for(columns))
+
+
+def compare(suburbs, columns):
+    """Fetch each suburb the old way (search + details, fixed masks) and the planned way.
+
+    Returns (old_calls, old_bytes, new_calls, new_bytes). Bypasses the response cache so
+    both plans hit the API.
+    """
+    import client
+    import app4
+    import keypool
+
+    old_search = ("places.id,places.displayName,places.formattedAddress,places.location,"
+                  "places.rating,places.userRatingCount")
+    old_details = "displayName,rating,userRatingCount,reviews"
+    pool = keypool.get_pool()
+
+    old_calls = old_bytes = new_calls = new_bytes = 0
+    for suburb in suburbs:
+        headers = {"Content-Type": "application/json", "X-Goog-Api-Key": pool.acquire()}
+        body = {"textQuery": f"Bunnings {suburb}, Australia"}
+        planned = dict(body, pageSize=1)  # app4 only uses the first result
+        response = client.post(app4.SEARCH_URL, json=body, headers=dict(headers, **{"X-Goog-FieldMask": old_search}))
+        old_calls, old_bytes = old_calls + 1, old_bytes + len(response.content)
+        places = response.json().get("places", [])
+        if places:
+            response = client.get(f"{app4.DETAILS_URL}{places[0]['id']}",
+                                  headers=dict(headers, **{"X-Goog-FieldMask": old_details}))
+            old_calls, old_bytes = old_calls + 1, old_bytes + len(response.content)
+
+        if search_suffices(columns):
+            response = client.post(app4.SEARCH_URL, json=planned,
+                                   headers=dict(headers, **{"X-Goog-FieldMask": search_mask(columns)}))
+            new_calls, new_bytes = new_calls + 1, new_bytes + len(response.content)
+        else:
+            response = client.post(app4.SEARCH_URL, json=planned,
+                                   headers=dict(headers, **{"X-Goog-FieldMask": search_mask(["Place ID"])}))
+            new_calls, new_bytes = new_calls + 1, new_bytes + len(response.content)
+            places = response.json().get("places", [])
+            if places:
+                response = client.get(f"{app4.DETAILS_URL}{places[0]['id']}",
+                                      headers=dict(headers, **{"X-Goog-FieldMask": details_mask(columns)}))
+                new_calls, new_bytes = new_calls + 1, new_bytes + len(response.content)
+    return old_calls, old_bytes, new_calls, new_bytes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show the minimal field masks for a set of output columns.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("mask", help="print the search and details field masks for some columns")
+    p.add_argument("columns", nargs="+", help='output columns, e.g. "Store Name" "Store Rating"')
+
+    p = sub.add_parser("compare", help="measure app4's old search + details calls against one planned search")
+    p.add_argument("suburbs", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "mask":
+        unknown = [c for c in args.columns if c not in COLUMN_FIELDS]
+        if unknown:
+            print(f"⚠️ Derived locally, no field needed: {', '.join(unknown)}")
+        print(f"🔎 search:  {search_mask(args.columns)}")
+        print(f"📄 details: {details_mask(args.columns)}")
+        print(f"💳 SKU tier: {sku_tier(args.columns)}")
+        sys.exit(0)
+
+    import app4
+
+    columns = app4.STORE_COLUMNS + app4.REVIEW_COLUMNS
+    old_calls, old_bytes, new_calls, new_bytes = compare(args.suburbs, columns)
+    print(f"📦 Before: {old_calls} calls, {old_bytes / 1024:.1f} KiB")
+    print(f"📦 After:  {new_calls} calls, {new_bytes / 1024:.1f} KiB ({search_mask(columns)})")
+    if old_bytes:
+        print(f"💾 Saved {old_calls - new_calls} calls and {(old_bytes - new_bytes) / 1024:.1f} KiB "
+              f"({1 - new_bytes / old_bytes:.0%})")
@@ -0,0 +1,43 @@
+# Thread-safe token bucket used to keep Places API calls under the QPS quota.
+import threading
+import time
+
+
+class TokenBucket:
+    """Allow up to `rate` acquisitions per second with bursts of `capacity`."""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens if they are available right now, without waiting."""
+        if self.rate <= 0:
+            return True
+        with self.lock:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until the requested number of tokens is available."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
@@ -0,0 +1,64 @@
+# Vectorized store-rating aggregation, rating categories and colour lookups for the maps.
+NO_STORES = "No Stores"
+
+
+def aggregate(df, by, weighted: bool = False):
+    """Average_Rating, Store_Count and Total_Ratings per group of a store frame.
+
+    With weighted=True the average is weighted by each store's Total Ratings, so a
+    store with thousands of reviews counts for more than one with a handful.
+    """
+    import pandas as pd
+
+    ratings = df["Store Rating"].astype("float64")
+    totals = df["Total Ratings"].astype("float64")
+    frame = pd.DataFrame({
+        "rating": ratings,
+        "total": totals,
+        "weighted": ratings * totals,
+        # Only stores that have both values contribute weight
+        "weight": totals.where(ratings.notna()),
+        "name": df["Store Name"],
+    })
+    for column in [by] if isinstance(by, str) else by:
+        frame[column] = df[column]
+
+    grouped = frame.groupby(by)
+    stats = pd.DataFrame({
+        "Average_Rating": grouped["rating"].mean(),
+        "Store_Count": grouped["name"].count(),
+        "Total_Ratings": grouped["total"].sum().round().astype("Int64"),
+    })
+    if weighted:
+        weights = grouped["weight"].sum()
+        stats["Average_Rating"] = (grouped["weighted"].sum() / weights.where(weights > 0)).fillna(stats["Average_Rating"])
+    return stats.reset_index()
+
+
+def rating_categories(values, decimals: int = 1, missing: str = NO_STORES):
+    """Ordered Categorical of ratings formatted to `decimals` places, with NaN as `missing`.
+
+    Only the distinct values are formatted in Python; rows are mapped by factorize codes.
+    """
+    import numpy as np
+    import pandas as pd
+
+    values = pd.Series(values, dtype="float64")
+    codes, uniques = pd.factorize(values)  # NaN -> -1
+    labels = np.array([f"{u:.{decimals}f}" for u in uniques] + [missing], dtype=object)
+    per_row = labels[np.where(codes >= 0, codes, len(labels) - 1)]
+    categories = sorted(set(labels[:-1]), key=float) + [missing]
+    return pd.Categorical(per_row, categories=categories, ordered=True)
+
+
+def colour_map(categories, scale: str = "Viridis", missing: str = NO_STORES, missing_colour: str = "white"):
+    """Colour per category label: an even sample of `scale` over the ratings, white for `missing`."""
+    import numpy as np
+    import plotly.express as px
+
+    labels = [c for c in categories if c != missing]
+    colours = {missing: missing_colour}
+    if labels:
+        positions = np.linspace(0, 1, len(labels)) if len(labels) > 1 else [0]
+        colours.update(zip(labels, px.colors.sample_colorscale(scale, list(positions))))
+    return colours
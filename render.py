@@ -0,0 +1,132 @@
+# Render every state- and suburb-level map for every metric to static files, in parallel.
+import sys
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import gazetteer
+import geometry
+import history
+
+METRICS = ["Average_Rating", "Store_Count", "Total_Ratings"]
+FORMATS = ("html", "png")
+OUTPUT_DIR = os.path.join("output", "maps")
+MAX_WORKERS = int(os.getenv("BUNNINGS_RENDER_WORKERS", str(os.cpu_count() or 2)))
+
+# Per-process store data, loaded once by the pool initializer
+_stores = None
+_weighted = False
+
+
+def _init_worker(stores_path, weighted):
+    global _stores, _weighted
+    import map2
+
+    _stores = map2.load_stores(stores_path)
+    _weighted = weighted
+
+
+def _write(fig, base, formats):
+    """Write a figure to each requested format, returning the paths written."""
+    written = []
+    for fmt in formats:
+        path = f"{base}.{fmt}"
+        if fmt == "html":
+            # Load plotly.js from a CDN instead of embedding ~3.5 MB in every file
+            fig.write_html(path, include_plotlyjs="cdn")
+        else:
+            fig.write_image(path)  # needs the optional kaleido package
+        written.append(path)
+    return written
+
+
+def render_state_map(stores_path, metric, out_dir, formats):
+    """One national map with a value per state; stores_path=None reads the history cube."""
+    import map as state_map
+
+    if stores_path is None:
+        state_stats = state_map.load_state_stats_from_history(_weighted)
+    else:
+        state_stats = state_map.load_state_stats(stores_path, _weighted)
+    fig = state_map.build_state_figure(state_stats, state_map.load_states_geojson(), metric)
+    return _write(fig, os.path.join(out_dir, f"states_{metric.lower()}"), formats)
+
+
+def render_suburb_maps(state_code, metrics, out_dir, formats):
+    """Every metric's suburb map for one state; the geodata join is shared across metrics."""
+    import map2
+
+    gdf2 = map2.suburb_geodata(_stores, state_code, _weighted)
+    written = []
+    for metric in metrics:
+        fig = map2.build_suburb_figure(gdf2.copy(), state_code, metric)
+        written += _write(fig, os.path.join(out_dir, f"suburbs_{state_code.lower()}_{metric.lower()}"), formats)
+    return written
+
+
+def render_all(stores_path, out_dir=OUTPUT_DIR, states=None, metrics=METRICS, formats=("html",),
+               max_workers=MAX_WORKERS, weighted=False, from_history=False):
+    """Fan state-level and per-state suburb-level renders out over worker processes."""
+    os.makedirs(out_dir, exist_ok=True)
+    if "png" in formats:
+        try:
+            import kaleido  # noqa: F401
+        except ImportError:
+            print("⚠️ PNG export needs the kaleido package; writing the other formats only")
+            formats = [f for f in formats if f != "png"]
+    if states is None:
+        states = [s for s in geometry.STATE_CODES if os.path.exists(geometry.source_path(s))]
+
+    # Build geometry caches and the gazetteer up front so workers don't race to write the same file
+    for state in states:
+        geometry.load_suburbs(state)
+    gazetteer.load()
+
+    started = time.time()
+    written = []
+    with ProcessPoolExecutor(max_workers=max(1, max_workers), initializer=_init_worker,
+                             initargs=(stores_path, weighted)) as executor:
+        state_source = None if from_history else stores_path
+        futures = {executor.submit(render_state_map, state_source, m, out_dir, formats): f"states/{m}"
+                   for m in metrics}
+        futures.update({executor.submit(render_suburb_maps, s, metrics, out_dir, formats): f"suburbs/{s}"
+                        for s in states})
+        for future in as_completed(futures):
+            try:
+                paths = future.result()
+            except Exception as e:
+                print(f"  ⚠️ Failed to render {futures[future]}: {e}")
+                continue
+            written += paths
+            print(f"  🗺️  {futures[future]}: {len(paths)} files")
+
+    print(f"\n🎉 Rendered {len(written)} files to {out_dir} in {time.time() - started:.1f}s")
+    return written
+
+
+def latest_snapshot():
+    files = history.latest_snapshots(1)  # finished runs only
+    return files[0] if files else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render all state and suburb maps to static files.")
+    parser.add_argument("--stores", help="store snapshot file or Parquet dataset (default: latest sweep)")
+    parser.add_argument("--out", default=OUTPUT_DIR, help="output directory")
+    parser.add_argument("--states", nargs="+", help="state codes for suburb maps (default: all with geometry)")
+    parser.add_argument("--metrics", nargs="+", choices=METRICS, default=METRICS)
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=["html"])
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="worker processes")
+    parser.add_argument("--weighted", action="store_true", help="weight average ratings by Total Ratings")
+    parser.add_argument("--history", action="store_true",
+                        help="read state statistics from the precomputed history cube")
+    args = parser.parse_args()
+
+    stores_path = args.stores or latest_snapshot()
+    if not stores_path:
+        print("❌ No store snapshot found; run app5.py first or pass --stores.")
+        sys.exit(1)
+
+    render_all(stores_path, args.out, [s.upper() for s in args.states] if args.states else None,
+               args.metrics, args.formats, args.workers, args.weighted, args.history)
@@ -0,0 +1,177 @@
+# Typed schema for store and review datasets, plus a partitioned Parquet writer/reader.
+#
+# pandas and pyarrow are only needed for the Parquet functions and are imported lazily,
+# so the scrapers keep working without them.
+import os
+import re
+from datetime import date, datetime, timezone
+
+# When BUNNINGS_PARQUET_DIR is set, app3/app4/app5 also write their output there as Parquet
+PARQUET_DIR = os.getenv("BUNNINGS_PARQUET_DIR")
+PARQUET_ROOT = PARQUET_DIR or os.path.join("output", "parquet")
+
+# Column -> pandas dtype. Every dataset written by the scrapers uses these names.
+STORE_COLUMNS = {
+    "Place ID": "string",
+    "State": "string",
+    "Suburb": "string",
+    "Store Name": "string",
+    "Address": "string",
+    "Store Rating": "float64",
+    "Total Ratings": "Int64",
+    "Latitude": "float64",
+    "Longitude": "float64",
+}
+
+REVIEW_COLUMNS = {
+    "Place ID": "string",
+    "State": "string",
+    "Store Name": "string",
+    "Store Rating": "float64",
+    "Total Ratings": "Int64",
+    "Author": "string",
+    "Rating": "Int64",
+    "Publish Time": "datetime64[ns, UTC]",
+    "Language": "string",
+    "Text": "string",
+    "Source": "string",
+}
+
+SCHEMAS = {"stores": STORE_COLUMNS, "reviews": REVIEW_COLUMNS}
+
+# app3 output uses different headers for the same store fields
+STORE_ALIASES = {"Rating": "Store Rating"}
+
+STATE_PATTERN = re.compile(r"\b(NSW|VIC|QLD|SA|WA|TAS|ACT|NT)\b\s*\d{4}")
+
+
+def state_from_address(address: str) -> str:
+    """Pull the state code out of an Australian formatted address ("" if absent)."""
+    match = STATE_PATTERN.search(address or "")
+    return match.group(1) if match else ""
+
+
+def _iso_from_unix(seconds) -> str:
+    return datetime.fromtimestamp(int(seconds), tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def normalise_new_review(review: dict) -> dict:
+    """Flatten a Places API (New) review into the review row layout."""
+    publish_time = review.get("publishTime", "")
+    text = review.get("originalText") or review.get("text") or {}
+    return {
+        "Author": review.get("authorAttribution", {}).get("displayName", "Anonymous"),
+        "Rating": review.get("rating", ""),
+        # Trim fractional seconds so the same review matches across both APIs
+        "Publish Time": publish_time[:19] + "Z" if publish_time else "",
+        "Language": text.get("languageCode", ""),
+        "Text": text.get("text", ""),
+        "Source": "places_v1",
+    }
+
+
+def normalise_legacy_review(review: dict) -> dict:
+    """Flatten a legacy Places API review into the review row layout."""
+    return {
+        "Author": review.get("author_name", "Anonymous"),
+        "Rating": review.get("rating", ""),
+        "Publish Time": _iso_from_unix(review["time"]) if review.get("time") else "",
+        "Language": review.get("original_language") or review.get("language", ""),
+        "Text": (review.get("text") or "").replace("\n", " "),
+        "Source": "places_legacy",
+    }
+
+
+def coerce(df, kind: str):
+    """Rename legacy headers and cast the columns of a stores/reviews frame to their schema dtypes."""
+    import pandas as pd
+
+    columns = SCHEMAS[kind]
+    if kind == "stores":
+        df = df.rename(columns={k: v for k, v in STORE_ALIASES.items() if k in df.columns and v not in df.columns})
+    for name, dtype in columns.items():
+        if name not in df.columns:
+            continue
+        if dtype in ("float64", "Int64"):
+            values = pd.to_numeric(df[name], errors="coerce")
+            df[name] = values.round().astype(dtype) if dtype == "Int64" else values.astype(dtype)
+        elif dtype.startswith("datetime64"):
+            df[name] = pd.to_datetime(df[name], errors="coerce", utc=True)
+        else:
+            df[name] = df[name].astype(dtype)
+    return df
+
+
+def to_frame(rows, kind: str):
+    """Build a typed DataFrame with exactly the schema's columns from an iterable of dict rows."""
+    import pandas as pd
+
+    df = pd.DataFrame(list(rows))
+    for name in SCHEMAS[kind]:
+        if name not in df.columns:
+            df[name] = None
+    return coerce(df, kind)[list(SCHEMAS[kind])]
+
+
+def write_parquet(rows, kind: str, root: str = PARQUET_ROOT, run_date: date = None) -> str:
+    """Append rows to root/<kind>/, partitioned by State and run_date. Returns the dataset path."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    df = to_frame(rows, kind)
+    if df.empty:
+        return os.path.join(root, kind)
+    df["State"] = df["State"].fillna("").replace("", "UNKNOWN")
+    df["run_date"] = (run_date or date.today()).isoformat()
+
+    path = os.path.join(root, kind)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    pq.write_to_dataset(
+        table,
+        path,
+        partition_cols=["State", "run_date"],
+        basename_template=f"part-{datetime.now().strftime('%H%M%S%f')}-{{i}}.parquet",
+    )
+    return path
+
+
+def read_dataset(kind: str, columns: list = None, states: list = None, run_date: str = None,
+                 root: str = PARQUET_ROOT):
+    """Load only the requested columns / partitions of a Parquet dataset with schema dtypes."""
+    import pandas as pd
+
+    filters = []
+    if states:
+        filters.append(("State", "in", list(states)))
+    if run_date:
+        filters.append(("run_date", "=", run_date))
+    df = pd.read_parquet(os.path.join(root, kind), columns=columns, filters=filters or None)
+    return coerce(df, kind)
+
+
+def _load(path: str, kind: str, columns: list = None):
+    import pandas as pd
+
+    if os.path.isdir(path) or path.endswith(".parquet"):
+        df = pd.read_parquet(path, columns=columns)
+    elif ".ndjson" in path or ".jsonl" in path:
+        df = pd.read_json(path, lines=True, dtype=False)
+    else:
+        wanted = set(columns or [])
+        aliases = STORE_ALIASES if kind == "stores" else {}
+        usecols = (lambda c: c in wanted or aliases.get(c) in wanted) if columns else None
+        df = pd.read_csv(path, usecols=usecols, dtype=str, keep_default_na=False, na_values=[""])
+    df = coerce(df, kind)
+    if columns:
+        df = df[[c for c in columns if c in df.columns]]
+    return df
+
+
+def load_stores(path: str, columns: list = None):
+    """Load a store snapshot from a CSV/NDJSON file or a Parquet dataset directory, typed."""
+    return _load(path, "stores", columns)
+
+
+def load_reviews(path: str, columns: list = None):
+    """Load harvested reviews from a CSV/NDJSON file or a Parquet dataset directory, typed."""
+    return _load(path, "reviews", columns)
@@ -0,0 +1,46 @@
+# Place stores in the suburb polygon that actually contains them, using an STRtree index.
+#
+# The search suburb in app5 output is only the suburb that was queried; neighbouring
+# suburbs often resolve to the same store. With store coordinates we can assign each
+# store to its true suburb in one bulk spatial-index query.
+
+def assign_suburbs(stores, suburbs, lat_col: str = "Latitude", lng_col: str = "Longitude"):
+    """Return a copy of `stores` with Suburb/State taken from the containing suburb polygon.
+
+    `suburbs` is a GeoDataFrame with SUBURB_NAME and STATE columns (see geometry.load_suburbs).
+    Stores without coordinates, or outside every polygon, keep their original Suburb/State.
+    A Located column records which rows were placed spatially.
+    """
+    import geopandas as gpd
+    import numpy as np
+
+    stores = stores.copy()
+    stores["Located"] = False
+    if lat_col not in stores.columns or lng_col not in stores.columns or suburbs.empty:
+        return stores
+
+    has_coords = stores[lat_col].notna() & stores[lng_col].notna()
+    if not has_coords.any():
+        return stores
+
+    rows = np.flatnonzero(has_coords.to_numpy())
+    points = gpd.points_from_xy(
+        stores[lng_col].to_numpy(dtype=float)[rows],
+        stores[lat_col].to_numpy(dtype=float)[rows],
+        crs="EPSG:4326",
+    )
+    if suburbs.crs is not None and suburbs.crs != points.crs:
+        points = points.to_crs(suburbs.crs)
+
+    # One vectorised STRtree query for all points: (point index, polygon index) pairs
+    point_idx, polygon_idx = suburbs.sindex.query(points, predicate="within")
+    # A point on a shared border can match two polygons; keep the first
+    point_idx, first = np.unique(point_idx, return_index=True)
+    polygon_idx = polygon_idx[first]
+
+    targets = stores.index[rows[point_idx]]
+    stores.loc[targets, "Suburb"] = suburbs["SUBURB_NAME"].to_numpy()[polygon_idx]
+    if "STATE" in suburbs.columns:
+        stores.loc[targets, "State"] = suburbs["STATE"].to_numpy()[polygon_idx]
+    stores.loc[targets, "Located"] = True
+    return stores
@@ -0,0 +1,293 @@
+# Local stand-in for the Google Places endpoints used by the scrapers, for benchmarks and dry runs.
+#
+# Serves legacy textsearch / findplacefromtext / details and Places API (New) searchText /
+# place details over a deterministic set of fake stores, with configurable latency,
+# pagination, error injection and 429 throttling. Point the scripts at it with
+#   PLACES_API_ROOT=http://127.0.0.1:8765 MAPS_API_ROOT=http://127.0.0.1:8765
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qsl
+
+STATES = ["NSW", "VIC", "QLD", "SA", "WA", "TAS", "ACT", "NT"]
+
+# Rough mainland + Tasmania bounding box (lat, lng)
+AU_SOUTH, AU_WEST, AU_NORTH, AU_EAST = -43.7, 113.3, -10.6, 153.7
+
+
+class StubConfig:
+    """Knobs for the fake API; all latencies in seconds, rates in [0, 1]."""
+
+    def __init__(self, stores=500, latency=0.05, jitter=0.02, error_rate=0.0, throttle_rate=0.0,
+                 page_size=20, max_results=60, token_delay=0.0, reviews_per_place=5, seed=0):
+        self.stores = stores
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.page_size = page_size
+        self.max_results = max_results
+        self.token_delay = token_delay
+        self.reviews_per_place = reviews_per_place
+        self.seed = seed
+
+
+def make_stores(count: int, seed: int = 0) -> list:
+    """Deterministic fake stores spread over Australia."""
+    rng = random.Random(seed)
+    stores = []
+    for i in range(count):
+        state = STATES[i % len(STATES)]
+        suburb = f"Suburb{i}"
+        stores.append({
+            "id": f"stub-{i}",
+            "suburb": suburb,
+            "state": state,
+            "name": f"Bunnings {suburb}",
+            "address": f"{i} Stub Rd, {suburb} {state} {2000 + i % 7000:04d}, Australia",
+            "lat": rng.uniform(AU_SOUTH, AU_NORTH),
+            "lng": rng.uniform(AU_WEST, AU_EAST),
+            "rating": round(rng.uniform(3.5, 4.8), 1),
+            "count": rng.randint(50, 3000),
+        })
+    return stores
+
+
+def _v1_place(store: dict) -> dict:
+    return {
+        "id": store["id"],
+        "displayName": {"text": store["name"], "languageCode": "en"},
+        "formattedAddress": store["address"],
+        "location": {"latitude": store["lat"], "longitude": store["lng"]},
+        "rating": store["rating"],
+        "userRatingCount": store["count"],
+    }
+
+
+def _legacy_place(store: dict) -> dict:
+    return {
+        "place_id": store["id"],
+        "name": store["name"],
+        "formatted_address": store["address"],
+        "geometry": {"location": {"lat": store["lat"], "lng": store["lng"]}},
+        "rating": store["rating"],
+        "user_ratings_total": store["count"],
+    }
+
+
+def _masked(place: dict, mask: str, prefix: str = "") -> dict:
+    """Keep only the top-level fields named in an X-Goog-FieldMask, as the real API does."""
+    if not mask or mask == "*" or mask == f"{prefix}*":
+        return place
+    wanted = {f[len(prefix):].split(".")[0] for f in mask.split(",") if f.strip().startswith(prefix)}
+    return {k: v for k, v in place.items() if k in wanted}
+
+
+def _reviews(store: dict, count: int, variant: str) -> list:
+    """Reviews for a store; each variant (language / sort) overlaps the others by a few reviews."""
+    offset = zlib.crc32(variant.encode()) % 3
+    base = int(store["id"].split("-")[1]) * 1000
+    return [
+        {"author": f"Reviewer {base + offset + k}", "rating": 1 + (base + offset + k) % 5,
+         "time": 1700000000 + (base + offset + k) * 3600, "text": f"Review {offset + k} of {store['name']}: staff were helpful"}
+        for k in range(count)
+    ]
+
+
+class StubState:
+    """Mutable server state shared by handler threads."""
+
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self.stores = make_stores(config.stores, config.seed)
+        self.by_id = {s["id"]: s for s in self.stores}
+        self.by_suburb = {s["suburb"].upper(): s for s in self.stores}
+        self.tokens = {}  # page token -> (results, offset, valid_from)
+        self.lock = threading.Lock()
+        self.rng = random.Random(config.seed)
+        self.requests = 0
+
+    def new_token(self, results: list, offset: int) -> str:
+        with self.lock:
+            token = f"tok{len(self.tokens)}"
+            self.tokens[token] = (results, offset, time.monotonic() + self.config.token_delay)
+        return token
+
+
+def make_handler(state: StubState):
+    config = state.config
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+        disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, payload: dict):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=UTF-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _faults(self) -> bool:
+            """Sleep for the configured latency and maybe inject a 429 / 500. True if a fault was sent."""
+            with state.lock:
+                state.requests += 1
+                roll = state.rng.random()
+                delay = max(0.0, config.latency + state.rng.uniform(-config.jitter, config.jitter))
+            time.sleep(delay)
+            if roll < config.throttle_rate:
+                self._send(429, {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED"}})
+                return True
+            if roll < config.throttle_rate + config.error_rate:
+                self._send(500, {"error": {"code": 500, "status": "INTERNAL"}})
+                return True
+            return False
+
+        def _page(self, results: list, offset: int, size: int):
+            """Slice one page and a token for the next one, capped at max_results overall."""
+            end = min(offset + size, len(results), config.max_results)
+            token = state.new_token(results, end) if end < min(len(results), config.max_results) else None
+            return results[offset:end], token
+
+        def _match_query(self, text: str) -> list:
+            text = text.upper().replace(", AUSTRALIA", "").replace("BUNNINGS WAREHOUSE", "").replace("BUNNINGS", "")
+            text = text.strip()
+            if not text:
+                return list(state.stores)
+            store = state.by_suburb.get(text)
+            if store:
+                return [store]
+            matches = [s for s in state.stores if s["state"] == text]
+            if matches:
+                return matches
+            # Unknown suburb: deterministically resolve to some store, like a nearby match
+            return [state.stores[zlib.crc32(text.encode()) % len(state.stores)]]
+
+        def do_GET(self):
+            if self._faults():
+                return
+            url = urlparse(self.path)
+            query = dict(parse_qsl(url.query))
+
+            if url.path.endswith("/place/textsearch/json"):
+                token = query.get("pagetoken")
+                if token:
+                    with state.lock:
+                        entry = state.tokens.get(token)
+                    if entry is None or time.monotonic() < entry[2]:
+                        return self._send(200, {"status": "INVALID_REQUEST", "results": []})
+                    results, offset = entry[0], entry[1]
+                else:
+                    results, offset = self._match_query(query.get("query", "")), 0
+                page, next_token = self._page(results, offset, config.page_size)
+                payload = {"status": "OK" if page else "ZERO_RESULTS", "results": [_legacy_place(s) for s in page]}
+                if next_token:
+                    payload["next_page_token"] = next_token
+                return self._send(200, payload)
+
+            if url.path.endswith("/place/findplacefromtext/json"):
+                store = self._match_query(query.get("input", ""))[0]
+                return self._send(200, {"status": "OK", "candidates": [_legacy_place(store)]})
+
+            if url.path.endswith("/place/details/json"):
+                store = state.by_id.get(query.get("place_id"))
+                if store is None:
+                    return self._send(200, {"status": "NOT_FOUND"})
+                variant = f"{query.get('reviews_sort', '')}/{query.get('language', '')}"
+                reviews = [{"author_name": r["author"], "rating": r["rating"], "time": r["time"], "text": r["text"],
+                            "language": query.get("language", "en")}
+                           for r in _reviews(store, config.reviews_per_place, variant)]
+                result = dict(_legacy_place(store), reviews=reviews)
+                return self._send(200, {"status": "OK", "result": result})
+
+            if url.path.startswith("/v1/places/"):
+                store = state.by_id.get(url.path.rsplit("/", 1)[1])
+                if store is None:
+                    return self._send(404, {"error": {"code": 404, "status": "NOT_FOUND"}})
+                place = self._v1_with_reviews(store, query.get("languageCode", "en"))
+                return self._send(200, _masked(place, self.headers.get("X-Goog-FieldMask")))
+
+            self._send(404, {"error": {"code": 404, "status": "NOT_FOUND"}})
+
+        def _v1_with_reviews(self, store: dict, language: str) -> dict:
+            reviews = [{
+                "authorAttribution": {"displayName": r["author"]},
+                "rating": r["rating"],
+                "publishTime": time.strftime("%Y-%m-%dT%H:%M:%S.000000Z", time.gmtime(r["time"])),
+                "text": {"text": r["text"], "languageCode": language},
+            } for r in _reviews(store, config.reviews_per_place, f"/{language}")]
+            return dict(_v1_place(store), reviews=reviews)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if self._faults():
+                return
+            if not self.path.startswith("/v1/places:searchText"):
+                return self._send(404, {"error": {"code": 404, "status": "NOT_FOUND"}})
+
+            size = min(int(body.get("pageSize", 20)), 20)
+            token = body.get("pageToken")
+            if token:
+                with state.lock:
+                    entry = state.tokens.get(token)
+                if entry is None:
+                    return self._send(400, {"error": {"code": 400, "status": "INVALID_ARGUMENT"}})
+                results, offset = entry[0], entry[1]
+            else:
+                rect = (body.get("locationRestriction") or {}).get("rectangle")
+                if rect:
+                    low, high = rect["low"], rect["high"]
+                    results = [s for s in state.stores
+                               if low["latitude"] <= s["lat"] < high["latitude"]
+                               and low["longitude"] <= s["lng"] < high["longitude"]]
+                else:
+                    results = self._match_query(body.get("textQuery", ""))
+                offset = 0
+            page, next_token = self._page(results, offset, size)
+            mask = self.headers.get("X-Goog-FieldMask")
+            language = body.get("languageCode", "en")
+            payload = {"places": [_masked(self._v1_with_reviews(s, language), mask, "places.") for s in page]} if page else {}
+            if next_token and (not mask or "nextPageToken" in mask or mask == "*"):
+                payload["nextPageToken"] = next_token
+            self._send(200, payload)
+
+    return Handler
+
+
+def start(config: StubConfig = None, host: str = "127.0.0.1", port: int = 0):
+    """Start the stub in a background thread. Returns (server, base_url, state)."""
+    state = StubState(config or StubConfig())
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}", state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local stub of the Google Places endpoints.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--stores", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.02, help="+/- seconds of latency jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered 429")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="seconds before a page token is valid")
+    args = parser.parse_args()
+
+    config = StubConfig(stores=args.stores, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                        throttle_rate=args.throttle_rate, token_delay=args.token_delay)
+    server, url, _ = start(config, port=args.port)
+    print(f"🧪 Places stub listening on {url} with {args.stores} stores (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,181 @@
+# Incremental review sync: only fetch reviews for stores whose rating or review count moved.
+#
+# Search results (app5 / app3 output) already carry each store's rating and
+# userRatingCount. Those are compared against the watermark saved at the last
+# sync, and the expensive place-details call is made only for stores that changed.
+import sys
+import argparse
+import os
+import sqlite3
+import time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+import app4
+import cache
+import harvest
+import history
+import keypool
+from ratelimit import TokenBucket
+import schema
+import writers
+
+# --- CONFIGURATION ---
+load_dotenv()
+
+WATERMARK_PATH = os.getenv("BUNNINGS_WATERMARK_PATH", os.path.join("output", "review_watermarks.sqlite"))
+MAX_WORKERS = int(os.getenv("BUNNINGS_MAX_WORKERS", "8"))
+PLACES_QPS = float(os.getenv("PLACES_QPS", "10"))
+
+OUTPUT_DIR = "output"
+
+
+def _number(value):
+    """Parse a rating / count cell, returning None for blanks and junk."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class Watermarks:
+    """Last synced rating and review count per place ID."""
+
+    def __init__(self, path: str = WATERMARK_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS watermarks ("
+            " place_id TEXT PRIMARY KEY, rating REAL, user_rating_count INTEGER, synced_at REAL)"
+        )
+
+    def all(self) -> dict:
+        """place ID -> (rating, user_rating_count)."""
+        rows = self.conn.execute("SELECT place_id, rating, user_rating_count FROM watermarks")
+        return {place_id: (rating, count) for place_id, rating, count in rows}
+
+    def update(self, place_id: str, rating, user_rating_count):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?, ?)",
+            (place_id, _number(rating), _number(user_rating_count), time.time()),
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def store_snapshot(path: str) -> dict:
+    """place ID -> {state, rating, count} from an app5 or app3 output file."""
+    stores = {}
+    for row in writers.read_rows(path):
+        place_id = row.get("Place ID")
+        if not place_id or place_id in stores:
+            continue
+        stores[place_id] = {
+            "state": row.get("State", ""),
+            "rating": _number(row.get("Store Rating", row.get("Rating"))),
+            "count": _number(row.get("Total Ratings")),
+        }
+    return stores
+
+
+def changed_stores(stores: dict, watermarks: dict) -> dict:
+    """Subset of stores that are new or whose rating / review count differs from the watermark."""
+    changed = {}
+    for place_id, store in stores.items():
+        if place_id not in watermarks:
+            changed[place_id] = store
+            continue
+        rating, count = watermarks[place_id]
+        if store["count"] != _number(count) or (
+            store["rating"] is not None and (rating is None or abs(store["rating"] - rating) > 1e-9)
+        ):
+            changed[place_id] = store
+    return changed
+
+
+def fetch_store_reviews(place_id: str, limiter=None):
+    """One place-details call via app4.get_reviews."""
+    if limiter:
+        limiter.acquire()
+    return app4.get_reviews(place_id)
+
+
+def _safe(func, *args):
+    try:
+        return func(*args), None
+    except Exception as e:
+        return None, e
+
+
+def sync(snapshot_file: str, output_file: str, max_workers=MAX_WORKERS, qps=PLACES_QPS):
+    """Fetch reviews for stores that changed since the last sync and advance their watermarks."""
+    stores = store_snapshot(snapshot_file)
+    marks = Watermarks()
+    changed = changed_stores(stores, marks.all())
+    print(f"🔍 {len(changed)} of {len(stores)} stores changed since the last sync")
+
+    # A changed store must not be answered from a cached details response
+    if cache.get_cache().mode == "on":
+        cache.set_mode("refresh")
+
+    limiter = TokenBucket(qps)
+    total_reviews = 0
+    failed = 0
+
+    with writers.RowWriter(output_file, harvest.FIELDNAMES) as writer, \
+            ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        results = executor.map(lambda p: _safe(fetch_store_reviews, p, limiter), changed)
+        for place_id, (result, error) in zip(changed, results):
+            if error:
+                print(f"  ⚠️ Error fetching {place_id}: {error}")
+                failed += 1
+                continue
+
+            store_name, store_rating, total_ratings, reviews = result
+            store = {"Store Name": store_name, "Store Rating": store_rating, "Total Ratings": total_ratings}
+            for review in reviews:
+                row = schema.normalise_new_review(review)
+                writer.write({"Place ID": place_id, "State": changed[place_id]["state"], **store, **row})
+            writer.flush()
+
+            # Watermark the values the search saw, so the next comparison is like for like
+            marks.update(place_id, changed[place_id]["rating"], changed[place_id]["count"])
+            total_reviews += len(reviews)
+            print(f"  ✅ {store_name}: {len(reviews)} reviews")
+
+    marks.close()
+    print(f"\n🎉 Synced {len(changed) - failed} stores, {total_reviews} reviews ({failed} failed)")
+    print(f"📁 Output file: {output_file}")
+
+
+def latest_snapshot():
+    """Most recent finished app5 output file in the output directory, or None."""
+    files = history.latest_snapshots(1, os.path.join(OUTPUT_DIR, "bunnings_stores_*"))
+    return files[0] if files else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch reviews only for stores whose ratings changed.")
+    parser.add_argument("snapshot", nargs="?", help="app5/app3 output file (default: latest in output/)")
+    parser.add_argument("--output", help="review output file (.csv/.ndjson, optionally .gz)")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="maximum concurrent detail calls")
+    parser.add_argument("--qps", type=float, default=PLACES_QPS, help="Places API queries per second (0 = unlimited)")
+    args = parser.parse_args()
+
+    snapshot = args.snapshot or latest_snapshot()
+    if not snapshot:
+        print("❌ No store snapshot found; run app5.py first or pass a file.")
+        sys.exit(1)
+    if not keypool.get_pool().keys:
+        print("❌ Google API key not found in .env file.")
+        sys.exit(1)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_file = args.output or os.path.join(OUTPUT_DIR, f"bunnings_review_sync_{timestamp}.csv")
+    sync(snapshot, output_file, max_workers=args.workers, qps=args.qps)
@@ -0,0 +1,153 @@
+# Streaming row writers: CSV or NDJSON, optionally gzip-compressed, flushed as rows arrive.
+import csv
+import gzip
+import json
+import os
+import zlib
+
+FORMATS = ("csv", "ndjson")
+
+
+def output_path(base: str, fmt: str = "csv", compress: bool = False) -> str:
+    """Build an output file name such as base.csv or base.ndjson.gz."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown output format '{fmt}', expected one of {FORMATS}")
+    return f"{base}.{fmt}" + (".gz" if compress else "")
+
+
+def detect_format(path: str):
+    """(format, compressed) implied by a file name's extensions."""
+    compressed = path.endswith(".gz")
+    stem = path[:-3] if compressed else path
+    fmt = "ndjson" if stem.endswith((".ndjson", ".jsonl")) else "csv"
+    return fmt, compressed
+
+
+def _open_text(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", newline="", encoding="utf-8")
+    return open(path, mode, newline="", encoding="utf-8")
+
+
+class RowWriter:
+    """Write dict rows one at a time to CSV or NDJSON without buffering the whole dataset."""
+
+    def __init__(self, path: str, fieldnames: list, append: bool = False):
+        self.path = path
+        self.fieldnames = list(fieldnames)
+        self.format, self.compressed = detect_format(path)
+        self.count = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        is_new = not append or not os.path.exists(path) or os.path.getsize(path) == 0
+        if append and not is_new:
+            # A crash can leave a partial last row (or an unterminated gzip member) that new rows
+            # would be glued onto; start from a clean copy of everything readable
+            _rewrite_readable(path, self.fieldnames)
+        self.file = _open_text(path, "a" if append else "w")
+
+        if self.format == "csv":
+            self.csv_writer = csv.DictWriter(self.file, fieldnames=self.fieldnames, extrasaction="ignore")
+            if is_new:
+                self.csv_writer.writeheader()
+
+    def write(self, row: dict):
+        if self.format == "csv":
+            self.csv_writer.writerow(row)
+        else:
+            record = {name: row.get(name) for name in self.fieldnames}
+            self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.count += 1
+
+    def write_many(self, rows):
+        """Consume an iterable (typically a generator) of rows, writing each as it arrives."""
+        for row in rows:
+            self.write(row)
+
+    def flush(self, durable: bool = False):
+        """Push buffered rows to the OS; with durable=True also fsync them to disk."""
+        self.file.flush()
+        if durable:
+            raw = getattr(self.file, "buffer", self.file)
+            # gzip text wrappers expose the compressed stream via .buffer.fileobj
+            fileobj = getattr(raw, "fileobj", None) or raw
+            fileobj.flush()
+            os.fsync(fileobj.fileno())
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _Lines:
+    """Iterate a file's lines, remembering whether the last one read was newline-terminated."""
+
+    def __init__(self, f):
+        self.f = f
+        self.terminated = True
+
+    def __iter__(self):
+        for line in self.f:
+            self.terminated = line.endswith("\n")
+            yield line
+
+
+def _parse(fmt: str, lines):
+    """(line number, row or None if unparseable) for each record read from `lines`."""
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            # A cut-off row is short (None values) or lacks its newline; glued rows are long (None key)
+            partial = None in row or None in row.values() or not lines.terminated
+            yield reader.line_num, None if partial else row
+        return
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield number, row if lines.terminated else None
+
+
+def read_rows(path: str):
+    """Yield dict rows back from a file written by RowWriter (CSV or NDJSON, gzip or not).
+
+    A crash can leave a truncated last row or gzip member, which is dropped. A bad row
+    anywhere else means the file is corrupt and raises ValueError.
+    """
+    fmt, _ = detect_format(path)
+    bad_line = None
+    with _open_text(path, "r") as f:
+        try:
+            for number, row in _parse(fmt, _Lines(f)):
+                if bad_line is not None:
+                    raise ValueError(f"Corrupt row at line {bad_line} of {path}")
+                if row is None:
+                    bad_line = number
+                    continue
+                yield row
+        except (EOFError, csv.Error):
+            # Truncated gzip stream or a cut-off quoted field: everything before it is valid
+            return
+        except (zlib.error, gzip.BadGzipFile) as e:
+            print(f"⚠️ {path} is corrupt after the rows read so far ({e}); the rest is skipped")
+            return
+
+
+def _rewrite_readable(path: str, fieldnames: list):
+    """Replace a file with a freshly written copy of the rows read_rows can recover from it."""
+    directory, name = os.path.split(path)
+    temp = os.path.join(directory, f".repair-{name}")
+    with RowWriter(temp, fieldnames) as writer:
+        writer.write_many(read_rows(path))
+        writer.flush(durable=True)
+    os.replace(temp, path)